@@ -3,3 +3,16 @@ from django.apps import AppConfig
 
 class ApiConfig(AppConfig):
     name = 'api'
+
+    def ready(self):
+        from django.conf import settings
+        from django.core.signals import request_started
+        from django.db.backends.signals import connection_created
+
+        from api_yamdb.database import check_connections, configure_sqlite
+        from .metrics import install_query_counter
+
+        connection_created.connect(configure_sqlite)
+        if settings.METRICS_ENABLED:
+            connection_created.connect(install_query_counter)
+        request_started.connect(check_connections)
@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.cache import user_cache_key
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT-аутентификация, пользователь берётся из кэша на
+    AUTH_USER_CACHE_TIMEOUT секунд. Кэш сбрасывается при записи пользователя.
+    Хэш пароля в кэш не попадает: поле остаётся отложенным.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                'Token contained no recognizable user identification'
+            )
+        key = user_cache_key(user_id)
+        values = cache.get(key)
+        if values is None:
+            user = super().get_user(validated_token)
+            cache.set(key, [getattr(user, name) for name in cached_fields()],
+                      settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, cached_fields(),
+                                       values)
+
+
+def cached_fields():
+    """Поля пользователя в кэше аутентификации: все, кроме пароля."""
+    return [
+        field.attname for field in get_user_model()._meta.concrete_fields
+        if field.name != 'password'
+    ]
@@ -1,7 +1,10 @@
 import django_filters
+from django.db.models import Case, F, IntegerField, When
 from django_filters import rest_framework as filters
+from rest_framework.filters import BaseFilterBackend
 
 from reviews.models import Title
+from reviews.search import search_titles
 
 
 class TitleFilter(filters.FilterSet):
@@ -20,3 +23,41 @@ class TitleFilter(filters.FilterSet):
     class Meta:
         model = Title
         fields = ('category', 'genre', 'name', 'year')
+
+
+class TitleSearchFilter(BaseFilterBackend):
+    """Полнотекстовый поиск ?search= с сортировкой по релевантности."""
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '').strip()
+        if not term:
+            return queryset
+        ids = search_titles(term)
+        if not ids:
+            return queryset.none()
+        rank = Case(
+            *(When(pk=pk, then=position) for position, pk in enumerate(ids)),
+            output_field=IntegerField()
+        )
+        return queryset.filter(pk__in=ids).order_by(rank)
+
+
+class TitleRatingOrdering(BaseFilterBackend):
+    """
+    ?ordering=rating и -rating по таблице рейтингов. Произведения без
+    строки рейтинга не пропадают из выдачи, а идут в конце.
+    """
+    ordering_param = 'ordering'
+    orderings = {
+        'rating': (F('ranking__rating').asc(nulls_last=True), 'pk'),
+        '-rating': (F('ranking__rating').desc(nulls_last=True), '-pk'),
+    }
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.orderings.get(
+            request.query_params.get(self.ordering_param)
+        )
+        if ordering is None:
+            return queryset
+        return queryset.order_by(*ordering)
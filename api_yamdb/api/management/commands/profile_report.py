@@ -0,0 +1,55 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.profiling import load_report
+
+SORT_FIELDS = ('total_p95', 'db_p95', 'queries_p95', 'count', 'n_plus_one')
+
+
+class Command(BaseCommand):
+    help = ('Сводка PROFILING_LOG по эндпоинтам: процентили времени, '
+            'число SQL-запросов и повторяющиеся запросы (N+1).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=settings.PROFILING_LOG,
+                            help='Файл с замерами.')
+        parser.add_argument('--sort', choices=SORT_FIELDS,
+                            default='total_p95')
+        parser.add_argument('--limit', type=int, default=3,
+                            help='Сколько повторяющихся запросов показать '
+                                 'для эндпоинта.')
+        parser.add_argument('--reset', action='store_true',
+                            help='Очистить файл после вывода.')
+
+    def handle(self, *args, **options):
+        path = options['file']
+        if not os.path.exists(path):
+            raise CommandError(
+                f'Нет файла {path}: включите PROFILING_ENABLED.'
+            )
+        report = load_report(path)
+        self.stdout.write(
+            f'{"endpoint":<40} {"count":>6} {"p50 ms":>8} {"p95 ms":>8} '
+            f'{"p99 ms":>8} {"db p95":>8} {"ser p95":>8} '
+            f'{"queries p95":>11} {"N+1":>5}'
+        )
+        ordered = sorted(
+            report.items(), key=lambda item: item[1][options['sort']],
+            reverse=True
+        )
+        for endpoint, stats in ordered:
+            self.stdout.write(
+                f'{endpoint:<40} {stats["count"]:>6} '
+                f'{stats["total_p50"] * 1000:>8.1f} '
+                f'{stats["total_p95"] * 1000:>8.1f} '
+                f'{stats["total_p99"] * 1000:>8.1f} '
+                f'{stats["db_p95"] * 1000:>8.1f} '
+                f'{stats["serializer_p95"] * 1000:>8.1f} '
+                f'{stats["queries_p95"]:>11} {stats["n_plus_one"]:>5}'
+            )
+            for sql, count in stats['duplicates'][:options['limit']]:
+                self.stdout.write(f'    x{count} {sql[:100]}')
+        if options['reset']:
+            open(path, 'w').close()
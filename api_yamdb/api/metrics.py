@@ -0,0 +1,432 @@
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import suppress
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+
+# Заголовок файла: занятые байты. Запись: длина ключа, ключ
+# с выравниванием до 8 байт и значение double.
+HEADER = struct.Struct('<Q')
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+INITIAL_SIZE = 1 << 20
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+                    5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+current_stats = ContextVar('current_stats', default=None)
+
+FILE_RE = re.compile(r'metrics_(\d+)\.db$')
+
+
+def encode_key(name, labels):
+    return json.dumps([name, labels], ensure_ascii=False).encode()
+
+
+class MmapValues:
+    """
+    Значения метрик процесса. С METRICS_DIR лежат в файле
+    metrics_<pid>.db, который читают остальные процессы.
+    """
+
+    def __init__(self, directory=None):
+        self.lock = threading.Lock()
+        self.indexes = {}
+        self.path = None
+        if directory:
+            self.path = os.path.join(directory, f'metrics_{os.getpid()}.db')
+        self.open(INITIAL_SIZE)
+        self.used = HEADER.unpack_from(self.map, 0)[0]
+        if self.used:
+            # Файл остался от процесса с тем же pid: продолжаем его счёт.
+            self.indexes = {
+                key: offset // VALUE.size
+                for key, offset in iter_entries(self.map)
+            }
+        else:
+            self.used = HEADER.size
+            HEADER.pack_into(self.map, 0, self.used)
+
+    def open(self, size):
+        if self.path is None:
+            self.map = mmap.mmap(-1, size)
+        else:
+            with open(self.path, 'a+b') as file:
+                size = max(size, os.fstat(file.fileno()).st_size)
+                file.truncate(size)
+                self.map = mmap.mmap(file.fileno(), size)
+        # Значения выровнены по 8 байт: пишем их как элементы массива.
+        self.doubles = memoryview(self.map).cast('d')
+
+    def grow(self, needed):
+        size = len(self.map)
+        while size < needed:
+            size *= 2
+        old = self.map
+        self.doubles.release()
+        if self.path is None:
+            self.open(size)
+            self.map[:len(old)] = old[:]
+        else:
+            self.open(size)
+        old.close()
+
+    def allocate(self, key):
+        """Добавляем запись ключа и возвращаем смещение её значения."""
+        padded = (KEY_LENGTH.size + len(key) + 7) // 8 * 8
+        end = self.used + padded + VALUE.size
+        if end > len(self.map):
+            self.grow(end)
+        KEY_LENGTH.pack_into(self.map, self.used, len(key))
+        start = self.used + KEY_LENGTH.size
+        self.map[start:start + len(key)] = key
+        offset = self.used + padded
+        VALUE.pack_into(self.map, offset, 0.0)
+        self.used = end
+        HEADER.pack_into(self.map, 0, self.used)
+        return offset
+
+    def index(self, key):
+        """Номер значения ключа в массиве doubles."""
+        index = self.indexes.get(key)
+        if index is None:
+            with self.lock:
+                index = self.indexes.get(key)
+                if index is None:
+                    index = self.allocate(encode_key(*key)) // VALUE.size
+                    self.indexes[key] = index
+        return index
+
+    def add(self, index, amount):
+        with self.lock:
+            self.doubles[index] += amount
+
+    def read(self):
+        return read_values(self.map)
+
+
+def iter_entries(data):
+    """Пары ((имя, метки), смещение значения) из файла метрик."""
+    used = HEADER.unpack_from(data, 0)[0]
+    position = HEADER.size
+    while position < used:
+        length = KEY_LENGTH.unpack_from(data, position)[0]
+        start = position + KEY_LENGTH.size
+        name, labels = json.loads(bytes(data[start:start + length]))
+        padded = (KEY_LENGTH.size + length + 7) // 8 * 8
+        yield (name, tuple(labels)), position + padded
+        position += padded + VALUE.size
+
+
+def read_values(data):
+    return {
+        key: VALUE.unpack_from(data, offset)[0]
+        for key, offset in iter_entries(data)
+    }
+
+
+class Counter:
+
+    kind = 'counter'
+
+    def __init__(self, registry, name, documentation, labelnames):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.cache = {}
+
+    def slot(self, labels):
+        index = self.cache.get(labels)
+        if index is None:
+            index = self.registry.values.index((self.name, labels))
+            self.cache[labels] = index
+        return index
+
+    def inc(self, labels, amount=1):
+        self.registry.values.add(self.slot(labels), amount)
+
+    def samples(self, values):
+        for (name, labels), value in sorted(values.items()):
+            if name == self.name:
+                yield name, zip(self.labelnames, labels), value
+
+
+class Histogram:
+    """Бакеты хранятся без накопления, складываются при выводе."""
+
+    kind = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames, buckets):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.bounds = [*map(str, self.buckets), '+Inf']
+        self.cache = {}
+
+    def slots(self, labels):
+        indexes = self.cache.get(labels)
+        if indexes is None:
+            values = self.registry.values
+            indexes = (
+                [values.index((f'{self.name}_bucket', labels + (bound,)))
+                 for bound in self.bounds],
+                values.index((f'{self.name}_sum', labels)),
+                values.index((f'{self.name}_count', labels)),
+            )
+            self.cache[labels] = indexes
+        return indexes
+
+    def observe(self, labels, value):
+        buckets, total, count = self.slots(labels)
+        values = self.registry.values
+        with values.lock:
+            doubles = values.doubles
+            doubles[buckets[bisect_left(self.buckets, value)]] += 1
+            doubles[total] += value
+            doubles[count] += 1
+
+    def samples(self, values):
+        buckets = defaultdict(dict)
+        for (name, labels), value in values.items():
+            if name == f'{self.name}_bucket':
+                buckets[labels[:-1]][labels[-1]] = value
+        for labels in sorted(buckets):
+            cumulative = 0
+            for bound in self.bounds:
+                cumulative += buckets[labels].get(bound, 0)
+                yield (f'{self.name}_bucket',
+                       zip(self.labelnames + ('le',), labels + (bound,)),
+                       cumulative)
+            for suffix in ('_sum', '_count'):
+                name = f'{self.name}{suffix}'
+                yield (name, zip(self.labelnames, labels),
+                       values.get((name, labels), 0))
+
+
+def process_alive(pid):
+    """Жив ли процесс: METRICS_DIR общий только для воркеров одной машины."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Registry:
+    """Метрики процесса с общим выводом для всех воркеров."""
+
+    def __init__(self):
+        self.metrics = []
+        self._values = None
+        os.register_at_fork(after_in_child=self.reset)
+
+    def reset(self):
+        """После fork воркер пишет в свой файл."""
+        self._values = None
+        for metric in self.metrics:
+            metric.cache.clear()
+
+    @property
+    def values(self):
+        if self._values is None:
+            self._values = MmapValues(settings.METRICS_DIR)
+        return self._values
+
+    def counter(self, name, documentation, labelnames):
+        metric = Counter(self, name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames, buckets):
+        metric = Histogram(self, name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self):
+        """Сумма значений всех процессов из METRICS_DIR."""
+        if not settings.METRICS_DIR:
+            return self.values.read()
+        totals = defaultdict(float)
+        pattern = os.path.join(settings.METRICS_DIR, 'metrics_*.db')
+        for path in glob.glob(pattern):
+            match = FILE_RE.search(path)
+            if match and not process_alive(int(match.group(1))):
+                # Воркер завершился: его файл больше никто не обновит.
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+                continue
+            with open(path, 'rb') as file:
+                for key, value in read_values(file.read()).items():
+                    totals[key] += value
+        return totals
+
+    def exposition(self):
+        values = self.collect()
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples(values):
+                text = ','.join(
+                    f'{label}="{escape(value)}"' for label, value in labels
+                )
+                lines.append(f'{name}{{{text}}} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"')
+
+
+VIEW_LABELS = ('view', 'action')
+
+registry = Registry()
+REQUESTS = registry.counter(
+    'api_requests_total', 'Число ответов по представлению и статусу.',
+    VIEW_LABELS + ('status',)
+)
+EXCEPTIONS = registry.counter(
+    'api_exceptions_total', 'Необработанные исключения в представлениях.',
+    VIEW_LABELS
+)
+DURATION = registry.histogram(
+    'api_request_duration_seconds', 'Время обработки запроса.',
+    VIEW_LABELS, DURATION_BUCKETS
+)
+QUERIES = registry.histogram(
+    'api_request_db_queries', 'Число SQL-запросов на один запрос.',
+    VIEW_LABELS, QUERY_BUCKETS
+)
+DB_TIME = registry.counter(
+    'api_db_query_seconds_total', 'Суммарное время SQL-запросов.',
+    VIEW_LABELS
+)
+
+UNRESOLVED = ('unresolved', '')
+
+
+def count_queries(execute, sql, params, many, context):
+    """Постоянная обёртка соединения: считает запросы текущего запроса."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += perf_counter() - started
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """Обработчик connection_created."""
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware:
+    """Считает запросы, время, ошибки и SQL по действиям DRF."""
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.labels = {}
+        self.values = None
+        self.slots = {}
+
+    def view_labels(self, request, view_func):
+        key = (view_func, request.method)
+        labels = self.labels.get(key)
+        if labels is None:
+            view = getattr(view_func, 'cls', None)
+            actions = getattr(view_func, 'actions', None) or {}
+            labels = (
+                view.__name__ if view else view_func.__name__,
+                actions.get(request.method.lower(), request.method.lower())
+            )
+            self.labels[key] = labels
+        return labels
+
+    def request_slots(self, labels, status):
+        """Ячейки всех метрик запроса: пишем их под одной блокировкой."""
+        slots = self.slots.get((labels, status))
+        if slots is None:
+            slots = (
+                REQUESTS.slot(labels + (status,)),
+                *DURATION.slots(labels),
+                *QUERIES.slots(labels),
+                DB_TIME.slot(labels),
+            )
+            self.slots[labels, status] = slots
+        return slots
+
+    def __call__(self, request):
+        stats = [0, 0.0]
+        token = current_stats.set(stats)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        duration = perf_counter() - started
+        values = registry.values
+        if values is not self.values:
+            # Новый процесс после fork: ячейки в другом файле.
+            self.values = values
+            self.slots = {}
+        (requests, durations, duration_sum, duration_count,
+         queries, queries_sum, queries_count, db_time) = self.request_slots(
+            getattr(request, '_metrics_labels', UNRESOLVED),
+            response.status_code
+        )
+        with values.lock:
+            doubles = values.doubles
+            doubles[requests] += 1
+            doubles[durations[bisect_left(DURATION.buckets, duration)]] += 1
+            doubles[duration_sum] += duration
+            doubles[duration_count] += 1
+            doubles[queries[bisect_left(QUERIES.buckets, stats[0])]] += 1
+            doubles[queries_sum] += stats[0]
+            doubles[queries_count] += 1
+            doubles[db_time] += stats[1]
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_labels = self.view_labels(request, view_func)
+
+    def process_exception(self, request, exception):
+        EXCEPTIONS.inc(getattr(request, '_metrics_labels', UNRESOLVED))
+
+
+def metrics_view(request):
+    """Метрики в текстовом формате Prometheus."""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    token = settings.METRICS_TOKEN
+    if token and not constant_time_compare(
+        request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}'
+    ):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        registry.exposition(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
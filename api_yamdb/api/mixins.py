@@ -1,11 +1,216 @@
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import mixins, viewsets, filters
+from rest_framework import mixins, viewsets, filters, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import MethodNotAllowed, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from api_yamdb.replicas import reading_from_replica
+from reviews.cache import get_catalogue_version
 
+from .pagination import PubDateCursorPagination
 from .permissions import IsAdminOrReadOnly
 
 
-class CreateDestroyListViewSet(mixins.CreateModelMixin,
+class ConditionalGetMixin:
+    """
+    ETag (и Last-Modified) по версии ресурса: на If-None-Match и
+    If-Modified-Since отвечаем 304 ещё до запросов к БД. Ответ,
+    прочитанный с реплики, ETag не получает: реплика могла отстать.
+    """
+    # Версии - метки времени изменения, по ним отдаём Last-Modified.
+    last_modified_from_versions = False
+
+    def get_resource_versions(self):
+        """Версии данных, от которых зависит ответ."""
+        return [get_catalogue_version()]
+
+    def get_request_fingerprint(self, request, versions):
+        """Хэш версий, действия, адреса и упорядоченных параметров."""
+        query = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        raw = '|'.join((
+            repr(versions), self.action,
+            request.build_absolute_uri(request.path), repr(query)
+        ))
+        return hashlib.md5(raw.encode('utf-8')).hexdigest()
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        """Отвечаем 304 или выставляем ETag и Last-Modified ответу."""
+        versions = self.get_resource_versions()
+        fingerprint = self.get_request_fingerprint(request, versions)
+        self.request_fingerprint = fingerprint
+        etag = quote_etag(f'{fingerprint}-{request.accepted_renderer.format}')
+        last_modified = None
+        if self.last_modified_from_versions:
+            last_modified = max(versions) // 10 ** 6
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if (response.status_code == status.HTTP_200_OK
+                and not reading_from_replica()):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class VersionedReadMixin(ConditionalGetMixin):
+    """Условные GET для списка и получения объекта."""
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class CatalogueCacheMixin(ConditionalGetMixin):
+    """
+    Кэш ответов каталога. Ключ учитывает версию каталога, адрес
+    и параметры запроса; любая запись в каталог меняет версию.
+    Кэш заполняют только чтения из основной базы.
+    """
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Отдаём данные из кэша или кладём туда успешный ответ."""
+        return self.conditional_response(
+            partial(self.read_through_cache, handler),
+            request, *args, **kwargs
+        )
+
+    def read_through_cache(self, handler, request, *args, **kwargs):
+        if not settings.API_CACHE_TIMEOUT:
+            return handler(request, *args, **kwargs)
+        key = f'api:{self.basename}:{self.request_fingerprint}'
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+        response = handler(request, *args, **kwargs)
+        if (response.status_code == status.HTTP_200_OK
+                and not reading_from_replica()):
+            cache.set(key, response.data, settings.API_CACHE_TIMEOUT)
+        return response
+
+
+class CachedListMixin(CatalogueCacheMixin):
+    """Кэшируем список объектов."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+
+class CachedRetrieveMixin(CatalogueCacheMixin):
+    """Кэшируем получение объекта."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class BulkMixin:
+    """
+    Создание, изменение и удаление списком объектов на /bulk/:
+    один запрос и одна транзакция, ошибки по каждому элементу.
+    DELETE принимает список значений bulk_lookup_field.
+    """
+    bulk_methods = ('post', 'patch', 'delete')
+    bulk_lookup_field = 'id'
+
+    @action(detail=False, methods=['post', 'patch', 'delete'])
+    def bulk(self, request):
+        method = request.method.lower()
+        if method not in self.bulk_methods:
+            raise MethodNotAllowed(request.method)
+        if (isinstance(request.data, list)
+                and len(request.data) > settings.BULK_MAX_ITEMS):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Не больше {settings.BULK_MAX_ITEMS} объектов за запрос.'
+            ]})
+        return getattr(self, f'bulk_{method}')(request)
+
+    def to_lookup(self, value):
+        """Значение поля поиска из запроса или None, если оно неверно."""
+        field = self.get_queryset().model._meta.get_field(
+            self.bulk_lookup_field
+        )
+        try:
+            return field.to_python(value)
+        except (DjangoValidationError, TypeError):
+            return None
+
+    def bulk_post(self, request):
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_patch(self, request):
+        items = request.data if isinstance(request.data, list) else []
+        lookups = [
+            self.to_lookup(item.get(self.bulk_lookup_field))
+            if isinstance(item, dict) else None
+            for item in items
+        ]
+        instances = self.get_queryset().in_bulk(
+            {lookup for lookup in lookups if lookup is not None},
+            field_name=self.bulk_lookup_field
+        )
+        serializer = self.get_serializer(
+            [instances.get(lookup) for lookup in lookups],
+            data=request.data, many=True, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
+
+    def bulk_delete(self, request):
+        if not isinstance(request.data, list):
+            raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+                f'Ожидается список значений {self.bulk_lookup_field}.'
+            ]})
+        field = self.bulk_lookup_field
+        lookups = [self.to_lookup(value) for value in request.data]
+        queryset = self.get_queryset().model._default_manager.filter(
+            **{f'{field}__in': {
+                lookup for lookup in lookups if lookup is not None
+            }}
+        )
+        found = set(queryset.values_list(field, flat=True))
+        errors = [
+            {} if lookup in found else {field: ['Объект не найден.']}
+            for lookup in lookups
+        ]
+        if any(errors):
+            raise ValidationError(errors)
+        with transaction.atomic():
+            queryset.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class CreateDestroyListViewSet(BulkMixin, CachedListMixin,
+                               mixins.CreateModelMixin,
                                mixins.DestroyModelMixin,
                                mixins.ListModelMixin,
                                viewsets.GenericViewSet):
@@ -15,3 +220,35 @@ class CreateDestroyListViewSet(mixins.CreateModelMixin,
     filter_backends = (DjangoFilterBackend, filters.SearchFilter)
     search_fields = ('name',)
     lookup_field = 'slug'
+    bulk_methods = ('post', 'delete')
+    bulk_lookup_field = 'slug'
+
+
+class CursorPaginationMixin:
+    """
+    Включает курсорную пагинацию по параметру ?pagination=cursor,
+    по умолчанию остаётся постраничная.
+    """
+    pagination_class = PageNumberPagination
+    cursor_pagination_class = PubDateCursorPagination
+    pagination_query_param = 'pagination'
+
+    def use_cursor_pagination(self):
+        """Клиент запросил курсорную пагинацию."""
+        request = getattr(self, 'request', None)
+        if request is None:
+            return False
+        return request.query_params.get(
+            self.pagination_query_param
+        ) == 'cursor'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.use_cursor_pagination():
+                self._paginator = self.cursor_pagination_class()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
@@ -0,0 +1,9 @@
+from rest_framework.pagination import CursorPagination
+
+
+class PubDateCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация по дате публикации: без OFFSET и COUNT(*),
+    порядок стабилен при добавлении новых записей.
+    """
+    ordering = ('-pub_date', '-id')
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from rest_framework.serializers import ListSerializer, Serializer
+
+current_profile = ContextVar('current_profile', default=None)
+
+# Управление транзакциями повторяется в каждом запросе, это не N+1.
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT',
+                          'RELEASE SAVEPOINT')
+
+_instrumented = False
+
+
+def timed_data(prop):
+    """Свойство data, которое считает время внешнего сериализатора."""
+
+    def data(self):
+        profile = current_profile.get()
+        if profile is None or profile.in_serializer:
+            return prop.fget(self)
+        profile.in_serializer = True
+        started = perf_counter()
+        try:
+            return prop.fget(self)
+        finally:
+            profile.serializer += perf_counter() - started
+            profile.in_serializer = False
+
+    return property(data)
+
+
+def instrument_serializers():
+    global _instrumented
+    if not _instrumented:
+        Serializer.data = timed_data(Serializer.data)
+        ListSerializer.data = timed_data(ListSerializer.data)
+        _instrumented = True
+
+
+class RequestProfile:
+    """SQL-запросы и времена этапов одного запроса."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.finished = None
+        self.view_started = None
+        self.view_finished = None
+        self.queries = Counter()
+        self.db = 0.0
+        self.serializer = 0.0
+        self.in_serializer = False
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: одинаковый текст SQL - одна сигнатура."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += perf_counter() - started
+            self.queries[sql] += 1
+
+    @property
+    def total(self):
+        return self.finished - self.started
+
+    @property
+    def view(self):
+        if self.view_started is None:
+            return 0.0
+        return (self.view_finished or self.finished) - self.view_started
+
+    @property
+    def render(self):
+        if self.view_finished is None:
+            return 0.0
+        return self.finished - self.view_finished
+
+    def duplicates(self):
+        """Повторяющиеся запросы - признак N+1."""
+        return [
+            (sql, count) for sql, count in self.queries.most_common()
+            if count >= settings.PROFILING_DUPLICATE_THRESHOLD
+            and not sql.startswith(TRANSACTION_STATEMENTS)
+        ]
+
+    def server_timing(self):
+        count = sum(self.queries.values())
+        duplicates = sum(count - 1 for _, count in self.duplicates())
+        metrics = (
+            ('db', self.db,
+             f'{count} queries, {duplicates} duplicates'),
+            ('view', self.view, None),
+            ('serializer', self.serializer, None),
+            ('render', self.render, None),
+            ('total', self.total, None),
+        )
+        return ', '.join(
+            f'{name};dur={seconds * 1000:.2f}'
+            + (f';desc="{desc}"' if desc else '')
+            for name, seconds, desc in metrics
+        )
+
+    def record(self, request, response):
+        match = request.resolver_match
+        return {
+            'endpoint': match.url_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'total': self.total,
+            'db': self.db,
+            'view': self.view,
+            'serializer': self.serializer,
+            'render': self.render,
+            'queries': sum(self.queries.values()),
+            'duplicates': self.duplicates(),
+        }
+
+
+class ProfileLog:
+    """
+    Файл JSON-строк с замерами. Строки дописываются с O_APPEND,
+    поэтому файл общий для всех процессов сервера.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = None
+        self.pid = None
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self.lock:
+            if self.pid != os.getpid():
+                # После fork у процесса должен быть свой дескриптор.
+                self.file = open(self.path, 'a', encoding='utf-8')
+                self.pid = os.getpid()
+            self.file.write(line)
+            self.file.flush()
+
+
+class ProfilingMiddleware:
+    """
+    Включается PROFILING_ENABLED. Добавляет заголовок Server-Timing
+    и пишет замеры в PROFILING_LOG для команды profile_report.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log = ProfileLog(settings.PROFILING_LOG)
+        instrument_serializers()
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(profile)
+                    )
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        profile.finished = perf_counter()
+        response['Server-Timing'] = profile.server_timing()
+        self.log.write(profile.record(request, response))
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_profile.get().view_started = perf_counter()
+
+    def process_template_response(self, request, response):
+        """Ответ DRF рендерится после этого вызова."""
+        current_profile.get().view_finished = perf_counter()
+        return response
+
+
+def percentile(values, percent):
+    """Процентиль по ближайшему рангу."""
+    ordered = sorted(values)
+    index = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(index)]
+
+
+def load_report(path):
+    """Сводка замеров по эндпоинтам: METHOD url_name."""
+    samples = defaultdict(list)
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            record = json.loads(line)
+            endpoint = f'{record["method"]} {record["endpoint"]}'
+            samples[endpoint].append(record)
+    report = {}
+    for endpoint, records in samples.items():
+        duplicates = Counter()
+        for record in records:
+            duplicates.update(dict(record['duplicates']))
+        stats = {'count': len(records)}
+        for field in ('total', 'db', 'view', 'serializer', 'queries'):
+            values = [record[field] for record in records]
+            for percent in (50, 95, 99):
+                stats[f'{field}_p{percent}'] = percentile(values, percent)
+        stats['n_plus_one'] = sum(
+            1 for record in records if record['duplicates']
+        )
+        stats['duplicates'] = duplicates.most_common()
+        report[endpoint] = stats
+    return report
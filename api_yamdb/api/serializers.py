@@ -1,12 +1,244 @@
+from collections import defaultdict
+
 from django.contrib.auth.validators import ASCIIUsernameValidator
 from django.core.validators import validate_email
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
-from rest_framework.relations import SlugRelatedField
+from rest_framework.relations import MANY_RELATION_KWARGS, SlugRelatedField
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
 
-from reviews.models import Category, Genre, Title, Review, Comment
+from reviews.cache import catalogue_bulk_changed
+from reviews.models import (Category, Genre, GenreTitle, Title, TitleRanking,
+                            Review, Comment)
 from users.models import CustomUser
-from .validators import category_slug_validator, title_year_validator
+from .validators import title_year_validator
+
+
+class SlugManyRelatedField(serializers.ManyRelatedField):
+    """
+    Список слагов разрешается одним запросом slug__in,
+    о всех неизвестных слагах сообщаем сразу.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        relation = self.child_relation
+        try:
+            slugs = list(dict.fromkeys(data))
+        except TypeError:
+            relation.fail('invalid')
+        objects = relation.preloaded()
+        if objects is None:
+            objects = {
+                getattr(obj, relation.slug_field): obj
+                for obj in relation.get_queryset().filter(
+                    **{f'{relation.slug_field}__in': slugs}
+                )
+            }
+        unknown = [smart_str(slug) for slug in slugs if slug not in objects]
+        if unknown:
+            relation.fail('does_not_exist', slug_name=relation.slug_field,
+                          value=', '.join(unknown))
+        return [objects[slug] for slug in slugs]
+
+
+class PreloadedSlugRelatedField(SlugRelatedField):
+    """
+    Берёт объекты из словаря в контексте, если список
+    сериализаторов загрузил их заранее одним запросом.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return SlugManyRelatedField(**list_kwargs)
+
+    def preloaded(self):
+        return self.context.get('preloaded_slugs', {}).get(
+            (self.queryset.model, self.slug_field)
+        )
+
+    def to_internal_value(self, data):
+        preloaded = self.preloaded()
+        if preloaded is None:
+            return super().to_internal_value(data)
+        try:
+            return preloaded[data]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        except TypeError:
+            self.fail('invalid')
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Список объектов для bulk-эндпоинтов. Слаги связей и уникальность
+    проверяются одним запросом на поле, запись идёт через
+    bulk_create/bulk_update в одной транзакции.
+    """
+    unique_fields = ()
+
+    def relation_fields(self):
+        for name, field in self.child.fields.items():
+            relation = getattr(field, 'child_relation', field)
+            if (isinstance(relation, PreloadedSlugRelatedField)
+                    and not field.read_only):
+                yield name, relation
+
+    def preload_slugs(self, data):
+        """Загружаем объекты по слагам из всех элементов списка."""
+        preloaded = {}
+        for name, relation in self.relation_fields():
+            slugs = set()
+            for item in data:
+                value = item.get(name) if isinstance(item, dict) else None
+                values = value if isinstance(value, list) else [value]
+                slugs.update(slug for slug in values if isinstance(slug, str))
+            objects = preloaded.setdefault(
+                (relation.queryset.model, relation.slug_field), {}
+            )
+            if slugs:
+                objects.update(
+                    (getattr(obj, relation.slug_field), obj)
+                    for obj in relation.get_queryset().filter(
+                        **{f'{relation.slug_field}__in': slugs}
+                    )
+                )
+        self._context['preloaded_slugs'] = preloaded
+
+    def unique_errors(self, name, data, errors):
+        """Одним запросом ищем занятые значения и повторы в списке."""
+        positions = defaultdict(list)
+        for index, item in enumerate(data):
+            value = item.get(name) if isinstance(item, dict) else None
+            if isinstance(value, str):
+                positions[value].append(index)
+        taken = set(self.child.Meta.model.objects.filter(
+            **{f'{name}__in': positions}
+        ).values_list(name, flat=True))
+        for value, indexes in positions.items():
+            if value in taken:
+                message = 'Значение не уникально.'
+            elif len(indexes) > 1:
+                message = 'Значение повторяется в списке.'
+            else:
+                continue
+            for index in indexes:
+                errors[index].setdefault(name, []).append(message)
+
+    def item_errors(self, data):
+        """Ошибки, которые проверяются сразу для всего списка."""
+        errors = [{} for _ in data]
+        for name in self.unique_fields:
+            self.unique_errors(name, data, errors)
+        if self.instance is not None:
+            for index, instance in enumerate(self.instance):
+                if instance is None:
+                    errors[index][api_settings.NON_FIELD_ERRORS_KEY] = [
+                        'Объект не найден.'
+                    ]
+        return errors
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        for name in self.unique_fields:
+            # Уникальность уже проверена одним запросом в item_errors.
+            field = self.child.fields[name]
+            field.validators = [
+                validator for validator in field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        self.preload_slugs(data)
+        errors = self.item_errors(data)
+        try:
+            value = super().to_internal_value(data)
+        except ValidationError as exc:
+            if not isinstance(exc.detail, list):
+                raise
+            for item_errors, extra in zip(exc.detail, errors):
+                for name, messages in extra.items():
+                    item_errors.setdefault(name, []).extend(messages)
+            raise ValidationError(exc.detail)
+        if any(errors):
+            raise ValidationError(errors)
+        return value
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        with transaction.atomic():
+            objs = model.objects.bulk_create(
+                model(**attrs) for attrs in validated_data
+            )
+            transaction.on_commit(catalogue_bulk_changed)
+        return objs
+
+    def update(self, instances, validated_data):
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for attr, value in attrs.items():
+                setattr(instance, attr, value)
+                fields.add(attr)
+        with transaction.atomic():
+            if fields:
+                self.child.Meta.model.objects.bulk_update(instances, fields)
+            transaction.on_commit(catalogue_bulk_changed)
+        return instances
+
+
+class SlugListSerializer(BulkListSerializer):
+    """Список категорий или жанров с уникальным слагом."""
+    unique_fields = ('slug',)
+
+
+class TitleListSerializer(BulkListSerializer):
+    """Список произведений: жанры пишутся пачкой в GenreTitle."""
+
+    def create(self, validated_data):
+        genres = [attrs.pop('genre', []) for attrs in validated_data]
+        titles = [Title(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            if connection.features.can_return_ids_from_bulk_insert:
+                Title.objects.bulk_create(titles)
+                TitleRanking.objects.rebuild([title.pk for title in titles])
+            else:
+                # Без RETURNING id не узнать: сохраняем по одному,
+                # рейтинги обновят сигналы сохранения.
+                for title in titles:
+                    title.save()
+            GenreTitle.objects.bulk_create(
+                GenreTitle(title=title, genre=genre)
+                for title, title_genres in zip(titles, genres)
+                for genre in dict.fromkeys(title_genres)
+            )
+            transaction.on_commit(catalogue_bulk_changed)
+        prefetch_related_objects(titles, 'genre')
+        return titles
+
+    def update(self, instances, validated_data):
+        genres = {
+            instance.pk: attrs.pop('genre')
+            for instance, attrs in zip(instances, validated_data)
+            if 'genre' in attrs
+        }
+        with transaction.atomic():
+            instances = super().update(instances, validated_data)
+            GenreTitle.objects.set_genres(genres)
+        for instance in instances:
+            instance.__dict__.pop('_prefetched_objects_cache', None)
+        prefetch_related_objects(instances, 'genre')
+        return instances
 
 
 class CustomUserSerializer(serializers.ModelSerializer):
@@ -34,11 +266,14 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
 class CategorySerializer(serializers.ModelSerializer):
     """Сериализатор для модели категорий."""
-    slug = serializers.CharField(validators=[category_slug_validator])
+    slug = serializers.CharField(validators=[UniqueValidator(
+        queryset=Category.objects.all(), message='Slug не уникален.'
+    )])
 
     class Meta:
         fields = ('name', 'slug')
         model = Category
+        list_serializer_class = SlugListSerializer
 
 
 class GenreSerializer(serializers.ModelSerializer):
@@ -46,6 +281,7 @@ class GenreSerializer(serializers.ModelSerializer):
     class Meta:
         fields = ('name', 'slug')
         model = Genre
+        list_serializer_class = SlugListSerializer
 
 
 class TitleReadOnlySerializer(serializers.ModelSerializer):
@@ -54,8 +290,7 @@ class TitleReadOnlySerializer(serializers.ModelSerializer):
     получения определённого произведения.
     """
     # поле rating - целое число, по требованию ТЗ.
-    rating = serializers.IntegerField(source='reviews__score__avg',
-                                      read_only=True)
+    rating = serializers.IntegerField(read_only=True)
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
     year = serializers.IntegerField(validators=[title_year_validator])
@@ -71,10 +306,10 @@ class TitleReadOnlySerializer(serializers.ModelSerializer):
 
 class TitleSerializer(TitleReadOnlySerializer):
     """ Сериализатор создания, обновления и удаления произведений."""
-    genre = serializers.SlugRelatedField(
+    genre = PreloadedSlugRelatedField(
         slug_field='slug', many=True, queryset=Genre.objects.all()
     )
-    category = serializers.SlugRelatedField(
+    category = PreloadedSlugRelatedField(
         slug_field='slug', queryset=Category.objects.all()
     )
 
@@ -82,6 +317,24 @@ class TitleSerializer(TitleReadOnlySerializer):
         fields = ('id', 'name', 'year',
                   'description', 'genre', 'category')
         model = Title
+        list_serializer_class = TitleListSerializer
+
+    def create(self, validated_data):
+        genres = validated_data.pop('genre', [])
+        with transaction.atomic():
+            title = super().create(validated_data)
+            GenreTitle.objects.set_genres({title.pk: genres})
+        return title
+
+    def update(self, instance, validated_data):
+        """Жанры меняем разницей связей, а не удалением всех."""
+        genres = validated_data.pop('genre', None)
+        with transaction.atomic():
+            title = super().update(instance, validated_data)
+            if genres is not None:
+                GenreTitle.objects.set_genres({title.pk: genres})
+                title.__dict__.pop('_prefetched_objects_cache', None)
+        return title
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -91,20 +344,6 @@ class ReviewSerializer(serializers.ModelSerializer):
                               read_only=True)
     score = serializers.IntegerField(min_value=1, max_value=10)
 
-    def validate(self, data):
-        """Проверяем, оставлял ли пользователь отзыв к произведению ранее."""
-        view = self.context['view']
-        request = self.context['request']
-        title_id = view.kwargs.get('title_id')
-        author = request.user
-        if (Review.objects.filter(author=author,
-                                  title__id=title_id).exists()
-                and request.method != 'PATCH'):
-            raise serializers.ValidationError(
-                'Вы уже оставляли отзыв к этому произведению.'
-            )
-        return data
-
     class Meta:
         fields = ('id', 'text', 'author', 'score', 'pub_date')
         model = Review
@@ -0,0 +1,51 @@
+import hashlib
+from collections.abc import Mapping
+
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class AuthIPThrottle(SimpleRateThrottle):
+    """Ограничение запросов к регистрации и выдаче токена с одного IP."""
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request)
+        }
+
+
+class RequestFieldThrottle(SimpleRateThrottle):
+    """Ограничение по значению поля запроса, например username."""
+    field = None
+
+    def get_cache_key(self, request, view):
+        # Тело-список не ограничиваем: ошибку вернёт сериализатор.
+        if not isinstance(request.data, Mapping):
+            return None
+        value = request.data.get(self.field)
+        if not value or not isinstance(value, str):
+            return None
+        ident = hashlib.md5(value.strip().lower().encode('utf-8'))
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': ident.hexdigest()
+        }
+
+
+class SignUpUsernameThrottle(RequestFieldThrottle):
+    """Ограничение регистраций на один username."""
+    scope = 'signup_identity'
+    field = 'username'
+
+
+class SignUpEmailThrottle(RequestFieldThrottle):
+    """Ограничение регистраций на один email."""
+    scope = 'signup_identity'
+    field = 'email'
+
+
+class TokenUsernameThrottle(RequestFieldThrottle):
+    """Ограничение попыток получить токен для одного username."""
+    scope = 'token_username'
+    field = 'username'
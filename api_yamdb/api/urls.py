@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 
 from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                     ReviewViewSet, TitleViewSet, CustomUserViewSet,
-                    GetTokenApiView, SignUpUserViewSet, UsersMeApiView
+                    GetTokenApiView, SignUpUserViewSet, SuggestApiView,
+                    UsersMeApiView
                     )
 
 app_name = 'api'
@@ -25,4 +26,5 @@ urlpatterns = [
     path('v1/users/me/', UsersMeApiView.as_view()),
     path('v1/', include(router_v1.urls)),
     path('v1/auth/token/', GetTokenApiView.as_view()),
+    path('v1/suggest/', SuggestApiView.as_view()),
 ]
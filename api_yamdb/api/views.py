@@ -1,19 +1,30 @@
+from django.conf import settings
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import EmailMessage
-from django.db.models import Avg
+from django.core.cache import cache
+from django.db import IntegrityError
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import permissions, status
 from rest_framework import viewsets, mixins, filters
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
+from reviews.cache import (SHARED_CHANGED_KEY, get_change_times,
+                           review_comments_key, title_reviews_key)
 from reviews.models import Review, Title, Genre, Category
+from reviews.suggest import suggest_index
 from users.models import CustomUser
-from .filters import TitleFilter
-from .mixins import CreateDestroyListViewSet
+from users.outbox import queue_email
+from .filters import TitleFilter, TitleRatingOrdering, TitleSearchFilter
+from .mixins import (
+    BulkMixin, CachedListMixin, CachedRetrieveMixin, CreateDestroyListViewSet,
+    CursorPaginationMixin, VersionedReadMixin
+)
 from .permissions import (
     OnlyAdminPermission, IsAdminOrReadOnly, ReadOnlyOrAuthorOrAdmin
 )
@@ -22,6 +33,10 @@ from .serializers import (
     ReviewSerializer, CommentSerializer, SignUpSerializer, GetTokenSerializer,
     TitleReadOnlySerializer
 )
+from .throttling import (
+    AuthIPThrottle, SignUpEmailThrottle, SignUpUsernameThrottle,
+    TokenUsernameThrottle
+)
 
 
 class CustomUserViewSet(viewsets.ModelViewSet):
@@ -47,62 +62,111 @@ class GenreViewSet(CreateDestroyListViewSet):
     serializer_class = GenreSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(BulkMixin, CachedListMixin, CachedRetrieveMixin,
+                   viewsets.ModelViewSet):
     """View-set для эндпоинта title."""
-    queryset = Title.objects.all().annotate(Avg('reviews__score'))
+    queryset = Title.objects.select_related(
+        'category'
+    ).prefetch_related('genre')
     serializer_class = TitleSerializer
     pagination_class = PageNumberPagination
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, TitleSearchFilter,
+                       TitleRatingOrdering)
     filterset_fields = ('category', 'genre', 'year', 'name')
     filterset_class = TitleFilter
 
     def get_serializer_class(self):
         """Определяем сериализаторы в зависимости от реквест методов."""
-        if self.action == 'create' or self.action == 'partial_update':
+        if self.action in ('create', 'partial_update', 'bulk'):
             return TitleSerializer
         return TitleReadOnlySerializer
 
+    @action(detail=False)
+    def trending(self, request):
+        """Произведения с наибольшим числом свежих отзывов."""
+        return self.cached_response(self.trending_page, request)
+
+    def trending_page(self, request):
+        queryset = self.get_queryset().filter(
+            ranking__trending__gt=0
+        ).order_by('-ranking__trending', '-ranking__title')
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-class ReviewViewSet(viewsets.ModelViewSet):
+
+class ReviewViewSet(VersionedReadMixin, CursorPaginationMixin,
+                    viewsets.ModelViewSet):
     """View-set для эндпоинта reviews."""
     serializer_class = ReviewSerializer
-    pagination_class = PageNumberPagination
     permission_classes = [ReadOnlyOrAuthorOrAdmin]
+    last_modified_from_versions = True
+
+    def get_resource_versions(self):
+        """Время изменения отзывов тайтла и общих изменений."""
+        return get_change_times(
+            title_reviews_key(self.kwargs.get('title_id')), SHARED_CHANGED_KEY
+        )
+
+    def get_title(self):
+        """Получаем тайтл один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
         """Получаем отзывы на выбранный тайтл."""
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        queryset = title.reviews.all()
-        return queryset
+        return self.get_title().reviews.all()
 
     def perform_create(self, serializer):
-        """Переопределяем сохранение тайтла и автора."""
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        author = self.request.user
-        serializer.save(author=author, title=title)
+        """
+        Переопределяем сохранение тайтла и автора.
+        Повторный отзыв отсекает ограничение unique_author_review.
+        """
+        try:
+            serializer.save(author=self.request.user, title=self.get_title())
+        except IntegrityError:
+            raise ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставляли отзыв к этому произведению.'
+                ]
+            })
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(VersionedReadMixin, CursorPaginationMixin,
+                     viewsets.ModelViewSet):
     """View-set для эндпоинта comments."""
     serializer_class = CommentSerializer
-    pagination_class = PageNumberPagination
     permission_classes = [ReadOnlyOrAuthorOrAdmin]
+    last_modified_from_versions = True
+
+    def get_resource_versions(self):
+        """Время изменения комментариев отзыва и общих изменений."""
+        return get_change_times(
+            review_comments_key(self.kwargs.get('review_id')),
+            SHARED_CHANGED_KEY
+        )
+
+    def get_review(self):
+        """Получаем отзыв один раз за запрос."""
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review,
+                pk=self.kwargs.get('review_id'),
+                title_id=self.kwargs.get('title_id')
+            )
+        return self._review
 
     def get_queryset(self):
         """Получаем комменты к нужному отзыву."""
-        review_id = self.kwargs.get('review_id')
-        title_id = self.kwargs.get('title_id')
-        review = get_object_or_404(Review, pk=review_id, title__id=title_id)
-        queryset = review.comments.all()
-        return queryset
+        return self.get_review().comments.all()
 
     def perform_create(self, serializer):
         """Переопределяем сохранение отзыва и автора."""
-        review_id = self.kwargs.get('review_id')
-        title_id = self.kwargs.get('title_id')
-        review = get_object_or_404(Review, pk=review_id, title__id=title_id)
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=self.request.user, review=self.get_review())
 
 
 class SignUpUserViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
@@ -110,24 +174,34 @@ class SignUpUserViewSet(mixins.CreateModelMixin, viewsets.GenericViewSet):
 
     serializer_class = SignUpSerializer
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [
+        AuthIPThrottle, SignUpUsernameThrottle, SignUpEmailThrottle
+    ]
     queryset = CustomUser.objects.all()
 
     @staticmethod
     def send_confirmation_code(user, to_email):
-        """Метод для отправки email с кодом подтверждения."""
+        """
+        Ставим в очередь письмо с кодом подтверждения.
+        Повторные запросы в пределах SIGNUP_RESEND_WINDOW не шлют письмо.
+        """
+        if not cache.add(f'signup:resend:{user.pk}', True,
+                         settings.SIGNUP_RESEND_WINDOW):
+            return
         mail_subject = 'Email confirmation. YamDb.'
         token = default_token_generator.make_token(user)
         message = ('Для завершения регистрации подтвердите Ваш email.'
                    f'\nToken:{token}')
-        email = EmailMessage(mail_subject, message, to=[to_email])
-        email.send()
+        queue_email(mail_subject, message, [to_email])
 
     def create(self, request, *args, **kwargs):
         """Проверяем уникальность email, меняем код 201 на 200."""
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         email = serializer.validated_data['email']
-        if CustomUser.objects.filter(email=email).exists():
+        if CustomUser.objects.filter(email=email).exclude(
+                username=serializer.validated_data['username']
+        ).exists():
             return Response(
                 'Такой email уже зарегистрирован.',
                 status=status.HTTP_400_BAD_REQUEST
@@ -178,6 +252,7 @@ class UsersMeApiView(APIView):
 class GetTokenApiView(APIView):
     """Получение JWT токена."""
     permission_classes = [permissions.AllowAny]
+    throttle_classes = [AuthIPThrottle, TokenUsernameThrottle]
 
     def post(self, request):
         """Генерим JWT-токен."""
@@ -185,19 +260,50 @@ class GetTokenApiView(APIView):
         serializer.is_valid(raise_exception=True)
         username = serializer.validated_data['username']
         confirmation_code = serializer.validated_data['confirmation_code']
-        if not CustomUser.objects.filter(username=username).exists():
+        user = CustomUser.objects.filter(username=username).first()
+        if user is None:
             return Response(
                 'Пользователь не найден.', status=status.HTTP_404_NOT_FOUND
             )
-        user = CustomUser.objects.get(username=username)
         if not default_token_generator.check_token(
                 user, confirmation_code
         ):
             return Response(
                 'Неверный e-mail.', status=status.HTTP_400_BAD_REQUEST
             )
+        if not user.is_active:
+            # Пишем только is_active: полное сохранение обновило бы
+            # last_login и сделало недействительными выданные коды.
+            user.is_active = True
+            user.save(update_fields=['is_active'])
         access_token = RefreshToken.for_user(user).access_token
-        user.is_active = True
-        user.save()
         data = {"token": str(access_token)}
         return Response(data, status=status.HTTP_200_OK)
+
+
+class SuggestApiView(APIView):
+    """Подсказки по началу названий произведений, жанров и категорий."""
+    permission_classes = [permissions.AllowAny]
+    authentication_classes = []
+    kinds = ('title', 'genre', 'category')
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', 0))
+        except ValueError:
+            limit = 0
+        if limit <= 0:
+            limit = settings.SUGGEST_LIMIT
+        limit = min(limit, settings.SUGGEST_MAX_LIMIT)
+        kinds = request.query_params.get('type')
+        if kinds:
+            kinds = set(kinds.split(','))
+            unknown = kinds.difference(self.kinds)
+            if unknown:
+                unknown = ', '.join(sorted(unknown))
+                raise ValidationError(
+                    {'type': [f'Неизвестный тип: {unknown}']}
+                )
+        return Response(suggest_index.search(
+            request.query_params.get('q', ''), limit, kinds
+        ))
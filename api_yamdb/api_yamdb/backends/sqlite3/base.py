@@ -0,0 +1,15 @@
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    SQLite, где транзакции сразу берут блокировку записи. С обычным
+    BEGIN транзакция, прочитавшая данные до чужой записи, получает
+    database is locked при своей записи, не дожидаясь busy_timeout.
+    Блокировку берут и atomic() только с чтением: такие блоки ждут
+    друг друга и запись. Чтение вне atomic() идёт в автокоммите
+    и не блокируется.
+    """
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute('BEGIN IMMEDIATE')
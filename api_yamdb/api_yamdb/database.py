@@ -0,0 +1,109 @@
+"""Настройки БД из переменных окружения и обработчики подключений."""
+import os
+from time import monotonic
+
+ENGINES = {
+    'sqlite': 'api_yamdb.backends.sqlite3',
+    'postgresql': 'django.db.backends.postgresql',
+}
+
+
+def database_from_env(base_dir, env=os.environ, prefix='DB'):
+    """
+    Словарь для DATABASES. DB_ENGINE: sqlite, postgresql или путь
+    к движку Django. Подключения держим DB_CONN_MAX_AGE секунд и
+    проверяем не чаще раза в DB_CONN_HEALTH_CHECK_INTERVAL секунд.
+    """
+    engine = env.get(f'{prefix}_ENGINE', 'sqlite')
+    database = {
+        'ENGINE': ENGINES.get(engine, engine),
+        'CONN_MAX_AGE': int(env.get(f'{prefix}_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': env.get(f'{prefix}_CONN_HEALTH_CHECKS',
+                                      '1') == '1',
+        'CONN_HEALTH_CHECK_INTERVAL': int(
+            env.get(f'{prefix}_CONN_HEALTH_CHECK_INTERVAL', 10)
+        ),
+    }
+    if database['ENGINE'] == ENGINES['postgresql']:
+        database.update({
+            'NAME': env.get(f'{prefix}_NAME', 'postgres'),
+            'USER': env.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': env.get('POSTGRES_PASSWORD', ''),
+            'HOST': env.get(f'{prefix}_HOST', 'localhost'),
+            'PORT': env.get(f'{prefix}_PORT', '5432'),
+            'OPTIONS': {
+                'connect_timeout': int(env.get(f'{prefix}_CONNECT_TIMEOUT',
+                                               5)),
+            },
+        })
+    else:
+        database.update({
+            'NAME': env.get(f'{prefix}_NAME',
+                            os.path.join(base_dir, 'db.sqlite3')),
+            # Выполняются на каждом новом подключении, см. configure_sqlite.
+            'PRAGMAS': {
+                'journal_mode': env.get('SQLITE_JOURNAL_MODE', 'WAL'),
+                'synchronous': env.get('SQLITE_SYNCHRONOUS', 'NORMAL'),
+                'mmap_size': int(env.get('SQLITE_MMAP_SIZE', 256 * 2 ** 20)),
+                'busy_timeout': int(env.get('SQLITE_BUSY_TIMEOUT', 5000)),
+            },
+        })
+    return database
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """Обработчик connection_created: PRAGMA из настроек базы."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in connection.settings_dict.get(
+                'PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def check_connections(**kwargs):
+    """
+    Обработчик request_started. Постоянное подключение могло оборваться
+    между запросами: закрываем его, следующий запрос к БД откроет новое.
+    Проверка - лишний запрос к БД, поэтому проверяем подключение не чаще
+    раза в CONN_HEALTH_CHECK_INTERVAL секунд, а не на каждом запросе.
+    """
+    from django.db import connections
+
+    now = monotonic()
+    for connection in connections.all():
+        settings_dict = connection.settings_dict
+        if (connection.connection is None
+                or not settings_dict.get('CONN_HEALTH_CHECKS')):
+            continue
+        checked_at = getattr(connection, 'health_checked_at', None)
+        if (checked_at is not None and now - checked_at
+                < settings_dict.get('CONN_HEALTH_CHECK_INTERVAL', 0)):
+            continue
+        connection.health_checked_at = now
+        if not connection.is_usable():
+            connection.close()
+
+
+def replicas_from_env(env=os.environ):
+    """DB_REPLICAS=replica1:3,replica2 - алиасы реплик и их веса."""
+    replicas = {}
+    for item in env.get('DB_REPLICAS', '').split(','):
+        alias, _, weight = item.strip().partition(':')
+        if alias:
+            replicas[alias] = int(weight or 1)
+    return replicas
+
+
+def replica_databases(base_dir, replicas, env=os.environ):
+    """
+    Настройки реплик из переменных DB_<АЛИАС>_*. В тестах реплики
+    смотрят в тестовую основную базу.
+    """
+    return {
+        alias: dict(
+            database_from_env(base_dir, env, prefix=f'DB_{alias.upper()}'),
+            TEST={'MIRROR': 'default'}
+        )
+        for alias in replicas
+    }
@@ -0,0 +1,110 @@
+"""
+Чтение с реплик. Безопасные запросы читают с реплики, которую
+ReplicaMiddleware выбирает взвешенным циклическим перебором. Запись
+и всё чтение после неё идут в основную базу; клиент, который писал,
+ещё REPLICA_PIN_SECONDS читает из основной базы по cookie.
+"""
+import threading
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+current_route = ContextVar('current_route', default=None)
+
+
+class Route:
+    """База чтения текущего запроса; replica=None - основная."""
+
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+    def pin(self):
+        self.replica = None
+        self.wrote = True
+
+
+def reading_from_replica():
+    """
+    Запрос читает с реплики, которая может отставать от основной базы:
+    такой ответ нельзя кэшировать под текущей версией данных.
+    """
+    route = current_route.get()
+    return route is not None and route.replica is not None
+
+
+class WeightedRoundRobin:
+    """
+    Плавный взвешенный перебор: при весах 3 и 1 порядок a a b a,
+    реплика с большим весом не получает запросы пачкой.
+    """
+
+    def __init__(self, weights):
+        self.weights = dict(weights)
+        self.total = sum(self.weights.values())
+        self.current = dict.fromkeys(self.weights, 0)
+        self.lock = threading.Lock()
+
+    def next(self):
+        with self.lock:
+            for alias, weight in self.weights.items():
+                self.current[alias] += weight
+            alias = max(self.current, key=self.current.get)
+            self.current[alias] -= self.total
+            return alias
+
+
+class ReplicaRouter:
+    """Вне запроса ReplicaMiddleware всё идёт в основную базу."""
+
+    def db_for_read(self, model, **hints):
+        route = current_route.get()
+        if route is None:
+            return None
+        return route.replica
+
+    def db_for_write(self, model, **hints):
+        route = current_route.get()
+        if route is not None:
+            # Дальше в этом запросе читаем то, что только что записали.
+            route.pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """На репликах те же данные, что и в основной базе."""
+        aliases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= aliases:
+            return True
+        return None
+
+
+class ReplicaMiddleware:
+    """Выбирает базу чтения запроса; без DATABASE_REPLICAS отключён."""
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.balancer = WeightedRoundRobin(settings.DATABASE_REPLICAS)
+
+    def __call__(self, request):
+        pinned = (request.method not in SAFE_METHODS
+                  or PIN_COOKIE in request.COOKIES)
+        route = Route(None if pinned else self.balancer.next())
+        token = current_route.set(route)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_route.reset(token)
+        if route.wrote:
+            response.set_cookie(PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS,
+                                httponly=True, samesite='Lax')
+        return response
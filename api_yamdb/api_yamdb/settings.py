@@ -3,6 +3,9 @@ from datetime import timedelta
 
 from dotenv import load_dotenv
 
+from .database import (database_from_env, replica_databases,
+                       replicas_from_env)
+
 load_dotenv()
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -31,6 +34,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.profiling.ProfilingMiddleware',
+    'api_yamdb.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -40,6 +46,24 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Профилирование запросов: заголовок Server-Timing и замеры
+# в PROFILING_LOG для команды profile_report.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '') == '1'
+PROFILING_LOG = os.getenv(
+    'PROFILING_LOG', os.path.join(BASE_DIR, 'profiling.jsonl')
+)
+# Сколько одинаковых запросов за запрос считаем признаком N+1.
+PROFILING_DUPLICATE_THRESHOLD = 2
+
+# Метрики Prometheus на /metrics, по умолчанию выключены. Для нескольких
+# воркеров задайте METRICS_DIR: каждый процесс пишет свой файл, вывод их
+# суммирует, а файлы завершившихся процессов удаляет. Каталог не должен
+# быть общим для нескольких машин или контейнеров.
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', '0') == '1'
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+# Если задан, /metrics требует заголовок Authorization: Bearer <токен>.
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 ROOT_URLCONF = 'api_yamdb.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
@@ -61,13 +85,70 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'api_yamdb.wsgi.application'
 
+# DB_ENGINE=postgresql: DB_NAME, POSTGRES_USER, POSTGRES_PASSWORD,
+# DB_HOST, DB_PORT. SQLite работает в режиме WAL, параметры PRAGMA
+# задают SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_MMAP_SIZE и
+# SQLITE_BUSY_TIMEOUT (мс).
+# Реплики для чтения: DB_REPLICAS=replica1:3,replica2:1 (алиас:вес),
+# каждая настраивается переменными DB_REPLICA1_ENGINE, DB_REPLICA1_NAME...
+DATABASE_REPLICAS = replicas_from_env()
 DATABASES = {
+    'default': database_from_env(BASE_DIR),
+    **replica_databases(BASE_DIR, DATABASE_REPLICAS),
+}
+DATABASE_ROUTERS = ['api_yamdb.replicas.ReplicaRouter']
+# Сколько секунд после записи клиент читает из основной базы.
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', 5))
+
+CACHE_BACKEND = os.getenv(
+    'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+)
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': os.getenv('CACHE_LOCATION', 'api_yamdb'),
     }
 }
 
+# В LocMemCache у каждого процесса свой кэш и свои версии данных.
+LOCAL_CACHE = CACHE_BACKEND.endswith('LocMemCache')
+
+# Время жизни кэша ответов каталога в секундах, 0 - кэш отключён.
+# Запись в одном воркере с LocMemCache не сбрасывает кэш других, поэтому
+# по умолчанию кэш ответов включён только с общим бэкендом (memcached,
+# redis, база).
+API_CACHE_TIMEOUT = int(os.getenv(
+    'API_CACHE_TIMEOUT', 0 if LOCAL_CACHE else 300
+))
+# Сколько секунд живёт версия каталога, 0 - бессрочно. С LocMemCache
+# ограничивает время, когда другой воркер отвечает 304 по старому ETag.
+CATALOGUE_VERSION_TIMEOUT = int(os.getenv(
+    'CATALOGUE_VERSION_TIMEOUT', 60 if LOCAL_CACHE else 0
+)) or None
+
+# Сколько секунд живут метки изменений отзывов и комментариев для ETag.
+CHANGE_TIMES_TIMEOUT = int(os.getenv('CHANGE_TIMES_TIMEOUT', 60))
+
+# Предельный возраст индексов подсказок и поиска в памяти процесса, с,
+# 0 - без ограничения. Изменения из других воркеров индекс узнаёт по
+# версиям в общем кэше, с LocMemCache - только по возрасту.
+INDEX_MAX_AGE = int(os.getenv('INDEX_MAX_AGE', 60 if LOCAL_CACHE else 0))
+
+# Полнотекстовый поиск произведений: auto, sqlite, postgresql или trigram.
+TITLE_SEARCH_BACKEND = os.getenv('TITLE_SEARCH_BACKEND', 'auto')
+# Максимум произведений в выдаче поиска.
+TITLE_SEARCH_LIMIT = int(os.getenv('TITLE_SEARCH_LIMIT', 200))
+
+# Число подсказок /api/v1/suggest/ по умолчанию и максимум для ?limit=.
+SUGGEST_LIMIT = 10
+SUGGEST_MAX_LIMIT = 50
+
+# Максимум объектов в одном запросе к /bulk/ эндпоинтам.
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 1000))
+
+# Окно в днях для /api/v1/titles/trending/.
+TRENDING_DAYS = int(os.getenv('TRENDING_DAYS', 7))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -88,7 +169,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
 
     'DEFAULT_FILTER_BACKENDS': [
@@ -96,9 +177,18 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'PAGE_SIZE': 10,
+
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_ip': os.getenv('THROTTLE_AUTH_IP', '30/minute'),
+        'signup_identity': os.getenv('THROTTLE_SIGNUP_IDENTITY', '5/hour'),
+        'token_username': os.getenv('THROTTLE_TOKEN_USERNAME', '10/minute'),
+    },
 }
 
+# Сколько секунд пользователь из JWT живёт в кэше аутентификации.
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=30),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -107,6 +197,24 @@ SIMPLE_JWT = {
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'confirmation-emails')
 
+# Очередь писем: sync - отправка в запросе после коммита,
+# thread - в пуле потоков процесса, worker - командой send_emails.
+# Команда send_emails нужна во всех режимах: повторы после ошибок
+# и удаление старых писем выполняет только она.
+EMAIL_QUEUE_MODE = os.getenv('EMAIL_QUEUE_MODE', 'thread')
+EMAIL_QUEUE_THREADS = int(os.getenv('EMAIL_QUEUE_THREADS', 2))
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 30
+EMAIL_QUEUE_LEASE = 300
+# Отправленные письма с кодами подтверждения храним сутки,
+# send_emails удаляет их раз в EMAIL_QUEUE_PURGE_INTERVAL секунд.
+EMAIL_QUEUE_KEEP_SENT = int(os.getenv('EMAIL_QUEUE_KEEP_SENT', 24 * 60 * 60))
+EMAIL_QUEUE_PURGE_INTERVAL = 60 * 60
+
+# Повторные запросы кода подтверждения в этом окне (с) не шлют новое письмо.
+SIGNUP_RESEND_WINDOW = int(os.getenv('SIGNUP_RESEND_WINDOW', 60))
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'Europe/Moscow'
@@ -25,7 +25,8 @@ class TitleAdmin(admin.ModelAdmin):
     """
     Администрирование произведений.
     """
-    list_display = ['name', 'year', 'description', 'category', 'show_genres']
+    list_display = ['name', 'year', 'description', 'category', 'show_genres',
+                    'rating_count']
     list_filter = ['name', 'year', 'category', 'genre']
     search_fields = ['name', 'year', 'category', 'genre']
     ordering = ['name', '-year']
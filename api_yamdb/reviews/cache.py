@@ -0,0 +1,128 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+
+
+def get_counter(key, timeout=None):
+    """Текущее значение счётчика версий; timeout=None - без срока."""
+    version = cache.get(key)
+    if version is None:
+        # После вытеснения или истечения ключа начинаем с метки времени,
+        # чтобы не совпасть со старыми версиями.
+        cache.add(key, int(time.time() * 1000), timeout)
+        version = cache.get(key)
+    return version
+
+
+def bump_counter(key, timeout=None):
+    """Увеличиваем счётчик и возвращаем новое значение."""
+    try:
+        return cache.incr(key)
+    except ValueError:
+        return get_counter(key, timeout)
+
+
+def get_catalogue_version():
+    """
+    Текущая версия данных каталога для ключей кэша и ETag. Живёт
+    CATALOGUE_VERSION_TIMEOUT секунд: с кэшем в памяти процесса запись
+    в другом воркере иначе никогда не сменила бы здесь ETag.
+    """
+    return get_counter(CATALOGUE_VERSION_KEY,
+                       settings.CATALOGUE_VERSION_TIMEOUT)
+
+
+def bump_catalogue_version():
+    """Инвалидируем весь кэш каталога сменой версии."""
+    bump_counter(CATALOGUE_VERSION_KEY, settings.CATALOGUE_VERSION_TIMEOUT)
+
+
+def index_expired(loaded_at):
+    """
+    Индекс в памяти процесса пора перестроить по возрасту. Счётчики
+    версий видны другим воркерам только через общий кэш, с LocMemCache
+    чужие изменения индекс увидит не позже INDEX_MAX_AGE секунд.
+    """
+    max_age = settings.INDEX_MAX_AGE
+    return (loaded_at is not None and bool(max_age)
+            and time.monotonic() - loaded_at >= max_age)
+
+
+# Меняется только при изменении названий, в отличие от версии каталога.
+SUGGEST_VERSION_KEY = 'suggest:version'
+
+
+def get_suggest_version():
+    return get_counter(SUGGEST_VERSION_KEY)
+
+
+def bump_suggest_version():
+    return bump_counter(SUGGEST_VERSION_KEY)
+
+
+# Меняется только при изменении произведений: отзывы её не трогают.
+TITLES_VERSION_KEY = 'titles:version'
+
+
+def get_titles_version():
+    return get_counter(TITLES_VERSION_KEY)
+
+
+def bump_titles_version():
+    return bump_counter(TITLES_VERSION_KEY)
+
+
+# Изменения, затрагивающие все отзывы и комментарии:
+# переименование авторов и массовый импорт.
+# Метки изменений живут CHANGE_TIMES_TIMEOUT секунд: истёкшая метка
+# заменяется текущим временем, так что ETag, выданный по метке из кэша
+# другого процесса, не отвечает 304 бесконечно.
+SHARED_CHANGED_KEY = 'shared:changed'
+
+
+def title_reviews_key(title_id):
+    return f'reviews:title:{title_id}:changed'
+
+
+def review_comments_key(review_id):
+    return f'comments:review:{review_id}:changed'
+
+
+def now_version():
+    """Метка времени изменения в микросекундах."""
+    return time.time_ns() // 1000
+
+
+def get_change_times(*keys):
+    """Метки времени последнего изменения для ключей."""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    if missing:
+        # Потерянную метку считаем изменением сейчас.
+        for key in missing:
+            cache.add(key, now_version(), settings.CHANGE_TIMES_TIMEOUT)
+        versions.update(cache.get_many(missing))
+    return [versions.get(key, now_version()) for key in keys]
+
+
+def touch(key):
+    """Отмечаем изменение данных под ключом."""
+    cache.set(key, now_version(), settings.CHANGE_TIMES_TIMEOUT)
+
+
+def catalogue_bulk_changed():
+    """Каталог изменён bulk-запросом без сигналов моделей."""
+    bump_catalogue_version()
+    bump_suggest_version()
+    bump_titles_version()
+
+
+def bulk_data_changed():
+    """Данные загружены в обход сигналов моделей: сбрасываем всё."""
+    bump_catalogue_version()
+    bump_suggest_version()
+    bump_titles_version()
+    touch(SHARED_CHANGED_KEY)
@@ -1,10 +1,58 @@
-from django.core.management.base import BaseCommand
+import os
+import time
+from concurrent.futures import (FIRST_COMPLETED, Future, ProcessPoolExecutor,
+                                wait)
 
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from reviews.cache import bump_catalogue_version
+from reviews.models import TitleRanking
+from .parsers.fast_loaders import fast_import
 from .parsers.model_parsers import (
-    category_parser, genre_parser, comment_parser, title_parser, review_parser,
-    genre_title_parser, custom_user_parser
+    DEFAULT_BATCH_SIZE, ON_CONFLICT_CHOICES, ON_CONFLICT_ERROR,
+    category_parser, genre_parser, comment_parser, title_parser,
+    review_parser, genre_title_parser, custom_user_parser
 )
 
+DEFAULT_DATA_DIR = 'static/data'
+
+
+def run_import(model, file, engine, **options):
+    """Импорт одной модели выбранным движком."""
+    if engine == 'fast':
+        return fast_import(model, file, **options)
+    return Command.HANDLERS[model](file, **options)
+
+
+def import_model(model, file, engine, **options):
+    """Импорт одной модели, выполняется в процессе пула."""
+    started = time.monotonic()
+    rows = run_import(model, file, engine, **options)
+    return rows, time.monotonic() - started
+
+
+def init_worker():
+    """У каждого процесса пула своё подключение к БД."""
+    django.setup()
+    connections.close_all()
+
+
+class InlineExecutor:
+    """Выполняет задачи сразу в текущем процессе."""
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as error:
+            future.set_exception(error)
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
 
 class Command(BaseCommand):
     help = 'Импорт данных в БД из csv файлов.'
@@ -19,9 +67,152 @@ class Command(BaseCommand):
         'custom-user': custom_user_parser
     }
 
+    FILES = {
+        'category': 'category.csv',
+        'genre': 'genre.csv',
+        'title': 'titles.csv',
+        'comment': 'comments.csv',
+        'review': 'review.csv',
+        'genre-title': 'genre_title.csv',
+        'custom-user': 'users.csv'
+    }
+
+    DEPENDENCIES = {
+        'category': (),
+        'genre': (),
+        'title': ('category',),
+        'comment': ('review', 'custom-user'),
+        'review': ('title', 'custom-user'),
+        'genre-title': ('title', 'genre'),
+        'custom-user': ()
+    }
+
     def add_arguments(self, parser):
         parser.add_argument('--model', nargs='?', type=str, action='store')
         parser.add_argument('--file', nargs='?', type=str, action='store')
+        parser.add_argument('--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help='Число строк в одной пачке INSERT.')
+        parser.add_argument('--engine', choices=('orm', 'fast'),
+                            default='orm',
+                            help='fast: COPY/executemany без создания '
+                                 'объектов моделей.')
+        parser.add_argument('--resume', action='store_true',
+                            help='Продолжить загрузку файла с чекпоинта.')
+        parser.add_argument('--on-conflict', choices=ON_CONFLICT_CHOICES,
+                            default=ON_CONFLICT_ERROR,
+                            help='skip: пропускать конфликтующие строки, '
+                                 'update: обновлять строки с тем же id.')
+        parser.add_argument('--all', action='store_true',
+                            help='Импорт всех моделей из каталога --dir '
+                                 'с учётом зависимостей.')
+        parser.add_argument('--dir', type=str, default=DEFAULT_DATA_DIR,
+                            help='Каталог с csv файлами для --all.')
+        parser.add_argument('--workers', type=int,
+                            help='Число процессов для --all, по умолчанию '
+                                 'число ядер. SQLite всегда грузится '
+                                 'в одном процессе.')
+
+    def report_progress(self, rows, elapsed):
+        """Выводим число загруженных строк и скорость загрузки."""
+        speed = rows / elapsed if elapsed else 0
+        self.stdout.write(f'{rows} строк, {speed:.0f} строк/с')
+
+    def import_options(self, options):
+        """Параметры, которые передаются парсерам."""
+        if options['engine'] == 'fast':
+            if (options['resume']
+                    or options['on_conflict'] != ON_CONFLICT_ERROR):
+                raise CommandError(
+                    '--resume и --on-conflict поддерживает только '
+                    'движок orm.'
+                )
+            return {'batch_size': options['batch_size']}
+        return {
+            'batch_size': options['batch_size'],
+            'resume': options['resume'],
+            'on_conflict': options['on_conflict'],
+        }
 
     def handle(self, *args, **options):
-        Command.HANDLERS[options['model']](options['file'])
+        if options['all']:
+            return self.import_all(options)
+        if options['model'] not in Command.HANDLERS:
+            raise CommandError(
+                f'Укажите --model из: {", ".join(Command.HANDLERS)}.'
+            )
+        rows = run_import(
+            options['model'],
+            options['file'],
+            options['engine'],
+            progress=self.report_progress,
+            **self.import_options(options)
+        )
+        self.refresh_rankings({options['model']})
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт {options["model"]} завершён: {rows} строк.'
+        ))
+
+    def refresh_rankings(self, models):
+        """Импорт идёт в обход сигналов: пересчитываем рейтинги сами."""
+        if models & {'title', 'review'}:
+            TitleRanking.objects.rebuild()
+            bump_catalogue_version()
+
+    def get_executor(self, workers):
+        """
+        Пул процессов. В SQLite пишет один процесс за раз: параллельные
+        загрузки только ждут блокировку и рискуют database is locked.
+        """
+        if connection.vendor == 'sqlite':
+            if workers is not None and workers > 1:
+                self.stderr.write(self.style.WARNING(
+                    'SQLite не поддерживает параллельную запись: '
+                    '--workers игнорируется, импорт в одном процессе.'
+                ))
+            return InlineExecutor()
+        workers = workers or os.cpu_count()
+        if workers <= 1:
+            return InlineExecutor()
+        connections.close_all()
+        return ProcessPoolExecutor(max_workers=workers,
+                                   initializer=init_worker)
+
+    def import_all(self, options):
+        """
+        Запускаем модель, как только загружены все её зависимости,
+        независимые модели грузятся параллельно.
+        """
+        pending = {
+            model: os.path.join(options['dir'], file)
+            for model, file in Command.FILES.items()
+        }
+        import_options = self.import_options(options)
+        done = set()
+        running = {}
+        executor = self.get_executor(options['workers'])
+        try:
+            while pending or running:
+                ready = [
+                    model for model in pending
+                    if set(Command.DEPENDENCIES[model]) <= done
+                ]
+                for model in ready:
+                    future = executor.submit(
+                        import_model, model, pending.pop(model),
+                        options['engine'], **import_options
+                    )
+                    running[future] = model
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    model = running.pop(future)
+                    rows, elapsed = future.result()
+                    done.add(model)
+                    self.stdout.write(
+                        f'Импорт {model} завершён: {rows} строк '
+                        f'за {elapsed:.1f} с.'
+                    )
+        finally:
+            executor.shutdown(wait=True)
+        self.refresh_rankings(done)
+        self.stdout.write(self.style.SUCCESS('Импорт всех моделей завершён.'))
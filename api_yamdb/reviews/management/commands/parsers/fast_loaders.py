@@ -0,0 +1,174 @@
+import csv
+import io
+import time
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from reviews.cache import bulk_data_changed
+from reviews.models import Genre, Category, Title, Comment, GenreTitle, Review
+from users.models import CustomUser
+from .model_parsers import (
+    DEFAULT_BATCH_SIZE, CsvStream, batches, reset_sequence
+)
+
+FAST_MODELS = {
+    'category': Category,
+    'genre': Genre,
+    'title': Title,
+    'comment': Comment,
+    'review': Review,
+    'genre-title': GenreTitle,
+    'custom-user': CustomUser
+}
+
+SQLITE_PRAGMAS = (
+    'PRAGMA synchronous = OFF',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -262144',
+)
+
+
+def table_layout(model, header):
+    """
+    Колонки таблицы для строк csv: колонки из заголовка файла,
+    остальные заполняем значениями по умолчанию полей модели.
+    """
+    fields = [model._meta.get_field(name) for name in header]
+    names = {field.name for field in fields}
+    now = timezone.now()
+    defaults = []
+    for field in model._meta.concrete_fields:
+        if field.name in names:
+            continue
+        if getattr(field, 'auto_now', False) or getattr(
+                field, 'auto_now_add', False):
+            value = now
+        else:
+            value = field.get_default()
+        defaults.append(
+            (field, field.get_db_prep_save(value, connection=connection))
+        )
+    columns = [field.column for field in fields]
+    columns += [field.column for field, _ in defaults]
+    return fields, columns, [value for _, value in defaults]
+
+
+def sqlite_converters(fields):
+    """SQLite хранит даты текстом в своём формате, приводим их."""
+    converters = []
+    for field in fields:
+        if isinstance(field, models.DateTimeField):
+            converters.append(
+                lambda value, field=field: field.get_db_prep_save(
+                    field.to_python(value), connection=connection
+                )
+            )
+        else:
+            converters.append(None)
+    return converters
+
+
+# Пустое поле без кавычек COPY в формате csv читает как NULL,
+# поэтому NULL пишем явным маркером, а '' остаётся пустой строкой.
+COPY_NULL = r'\N'
+
+
+def copy_sql(table, columns):
+    return "COPY {} ({}) FROM STDIN WITH (FORMAT csv, NULL '{}')".format(
+        connection.ops.quote_name(table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        COPY_NULL
+    )
+
+
+def copy_buffer(rows):
+    """
+    Строки для COPY: None - маркер NULL без кавычек, в кавычках
+    его COPY прочитал бы как текст.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([
+            COPY_NULL if value is None else value for value in row
+        ])
+    buffer.seek(0)
+    return buffer
+
+
+def copy_rows(table, columns, rows, batch_size, progress):
+    """PostgreSQL: COPY FROM STDIN пачками."""
+    sql = copy_sql(table, columns)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for batch in batches(rows, batch_size):
+            cursor.cursor.copy_expert(sql, copy_buffer(batch))
+            progress(len(batch))
+
+
+def insert_rows(table, columns, rows, batch_size, progress):
+    """Остальные БД: подготовленный executemany в одной транзакции."""
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(table),
+        ', '.join(connection.ops.quote_name(column) for column in columns),
+        ', '.join(['%s'] * len(columns))
+    )
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA synchronous')
+            synchronous = cursor.fetchone()[0]
+            for pragma in SQLITE_PRAGMAS:
+                cursor.execute(pragma)
+        try:
+            with transaction.atomic():
+                for batch in batches(rows, batch_size):
+                    cursor.executemany(sql, batch)
+                    progress(len(batch))
+        finally:
+            if connection.vendor == 'sqlite':
+                cursor.execute(f'PRAGMA synchronous = {synchronous}')
+
+
+def fast_import(model_name, file, batch_size=DEFAULT_BATCH_SIZE,
+                progress=None):
+    """
+    Загружаем csv прямо в таблицу модели, минуя создание объектов:
+    COPY для PostgreSQL, executemany для остальных БД.
+    """
+    model = FAST_MODELS[model_name]
+    stream = CsvStream(file)
+    lines = iter(stream)
+    fields, columns, defaults = table_layout(model, stream.header)
+    if connection.vendor == 'sqlite':
+        converters = sqlite_converters(fields)
+        if any(converters):
+            lines = (
+                [value if convert is None else convert(value)
+                 for convert, value in zip(converters, line)]
+                for line in lines
+            )
+    title_ids = set()
+    if model is Review:
+        # Пересчитываем рейтинг только у тайтлов из файла.
+        title_column = stream.header.index('title_id')
+        lines = (
+            title_ids.add(line[title_column]) or line for line in lines
+        )
+    rows = (line + defaults for line in lines)
+
+    started = time.monotonic()
+    loaded = 0
+
+    def count(batch_rows):
+        nonlocal loaded
+        loaded += batch_rows
+        if progress is not None:
+            progress(loaded, time.monotonic() - started)
+
+    load = copy_rows if connection.vendor == 'postgresql' else insert_rows
+    load(model._meta.db_table, columns, rows, batch_size, count)
+    reset_sequence(model)
+    for ids in batches(title_ids, batch_size):
+        Title.objects.filter(pk__in=ids).refresh_ratings()
+    bulk_data_changed()
+    return loaded
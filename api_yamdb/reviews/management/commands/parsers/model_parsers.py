@@ -1,96 +1,217 @@
 import csv
 import os
+import time
+from itertools import islice
 
 from django.conf import settings
-from reviews.models import Genre, Category, Title, Comment, GenreTitle, Review
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from reviews.cache import bulk_data_changed
+from reviews.models import (Genre, Category, Title, Comment, GenreTitle,
+                            ImportCheckpoint, Review)
 from users.models import CustomUser
 
-
-def csv_parser(file):
-    """Выносим общий для всех парсеров функционал по csv."""
-    file_path = os.path.join(settings.BASE_DIR, file)
-    result = []
-    with open(file_path, newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        next(reader)
-        for row in reader:
-            result.append(row)
-    return result
-
-
-def category_parser(file):
+DEFAULT_BATCH_SIZE = 1000
+
+ON_CONFLICT_ERROR = 'error'
+ON_CONFLICT_SKIP = 'skip'
+ON_CONFLICT_UPDATE = 'update'
+ON_CONFLICT_CHOICES = (ON_CONFLICT_ERROR, ON_CONFLICT_SKIP, ON_CONFLICT_UPDATE)
+
+
+class CsvStream:
+    """
+    Построчное чтение csv, помнит смещение в байтах и номер строки
+    после последней отданной записи - по ним сохраняется чекпоинт.
+    """
+
+    def __init__(self, file):
+        self.path = os.path.join(settings.BASE_DIR, file)
+        with open(self.path, newline='', encoding='utf-8') as f:
+            self.header = next(csv.reader(f))
+        self.offset = 0
+        self.rows = 0
+
+    def seek(self, offset, rows):
+        """Продолжаем чтение с сохранённой позиции."""
+        self.offset = offset
+        self.rows = rows
+
+    def lines(self, f):
+        for line in f:
+            self.offset += len(line)
+            yield line.decode('utf-8')
+
+    def __iter__(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            reader = csv.reader(self.lines(f))
+            if not self.rows:
+                next(reader, None)
+            for row in reader:
+                self.rows += 1
+                yield row
+
+
+def batches(iterable, batch_size):
+    """Нарезаем поток на списки длиной не больше batch_size."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def save_batch(model, batch, header, on_conflict):
+    """
+    Сохраняем пачку. skip - пропускаем конфликтующие строки,
+    update - строки с уже существующим id обновляем полями из csv.
+    """
+    if on_conflict == ON_CONFLICT_UPDATE:
+        pk_field = model._meta.pk
+        for obj in batch:
+            obj.pk = pk_field.to_python(obj.pk)
+        existing = set(model.objects.filter(
+            pk__in=[obj.pk for obj in batch]
+        ).values_list('pk', flat=True))
+        fields = [
+            model._meta.get_field(name).name
+            for name in header if name != pk_field.name
+        ]
+        model.objects.bulk_update(
+            [obj for obj in batch if obj.pk in existing], fields
+        )
+        batch = [obj for obj in batch if obj.pk not in existing]
+    model.objects.bulk_create(
+        batch, ignore_conflicts=on_conflict != ON_CONFLICT_ERROR
+    )
+
+
+def bulk_import(model, objs, stream, batch_size=DEFAULT_BATCH_SIZE,
+                progress=None, after_batch=None, resume=False,
+                on_conflict=ON_CONFLICT_ERROR):
+    """
+    Сохраняем поток объектов пачками, каждая пачка в своей транзакции
+    вместе с чекпоинтом файла. resume продолжает с чекпоинта.
+    progress(rows, elapsed) вызывается после каждой пачки.
+    """
+    checkpoint, _ = ImportCheckpoint.objects.get_or_create(file=stream.path)
+    if resume and checkpoint.offset <= os.path.getsize(stream.path):
+        stream.seek(checkpoint.offset, checkpoint.rows)
+    started = time.monotonic()
+    rows = 0
+    for batch in batches(objs, batch_size):
+        with transaction.atomic():
+            save_batch(model, batch, stream.header, on_conflict)
+            if after_batch is not None:
+                after_batch(batch)
+            ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                offset=stream.offset, rows=stream.rows,
+                updated=timezone.now()
+            )
+        rows += len(batch)
+        if progress is not None:
+            progress(rows, time.monotonic() - started)
+    reset_sequence(model)
+    bulk_data_changed()
+    return rows
+
+
+def reset_sequence(model):
+    """Сдвигаем счётчик id после загрузки строк с явными id."""
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [model]):
+            cursor.execute(sql)
+
+
+def category_parser(file, **options):
     """Парсер для модели категорий."""
-    rows = csv_parser(file)
-    objs = [
+    stream = CsvStream(file)
+    objs = (
         Category(
+            id=row[0],
             name=row[1],
             slug=row[2],
         )
-        for row in rows
-    ]
-    Category.objects.bulk_create(objs)
+        for row in stream
+    )
+    return bulk_import(Category, objs, stream, **options)
 
 
-def genre_parser(file):
+def genre_parser(file, **options):
     """Парсер для модели жанров."""
-    rows = csv_parser(file)
-    objs = [
+    stream = CsvStream(file)
+    objs = (
         Genre(
+            id=row[0],
             name=row[1],
             slug=row[2],
         )
-        for row in rows
-    ]
-    Genre.objects.bulk_create(objs)
+        for row in stream
+    )
+    return bulk_import(Genre, objs, stream, **options)
 
 
-def title_parser(file):
+def title_parser(file, **options):
     """Парсер для модели тайтлов."""
-    rows = csv_parser(file)
-    objs = [
+    stream = CsvStream(file)
+    objs = (
         Title(
+            id=row[0],
             name=row[1],
             year=row[2],
             category_id=row[3]
         )
-        for row in rows
-    ]
-    Title.objects.bulk_create(objs)
+        for row in stream
+    )
+    return bulk_import(Title, objs, stream, **options)
 
 
-def genre_title_parser(file):
+def genre_title_parser(file, **options):
     """Парсер для промежуточной модели тайтлов и жанров."""
-    rows = csv_parser(file)
-    objs = [
+    stream = CsvStream(file)
+    objs = (
         GenreTitle(
+            id=row[0],
             title_id=row[1],
             genre_id=row[2],
         )
-        for row in rows
-    ]
-    GenreTitle.objects.bulk_create(objs)
+        for row in stream
+    )
+    return bulk_import(GenreTitle, objs, stream, **options)
+
 
+def refresh_review_ratings(batch):
+    """Обновляем рейтинги тайтлов, затронутых пачкой отзывов."""
+    Title.objects.filter(
+        pk__in={obj.title_id for obj in batch}
+    ).refresh_ratings()
 
-def review_parser(file):
+
+def review_parser(file, **options):
     """Парсер для модели отзывов."""
-    rows = csv_parser(file)
-    objs = [
+    stream = CsvStream(file)
+    objs = (
         Review(
+            id=row[0],
             title_id=row[1],
             text=row[2],
             author_id=row[3],
             score=row[4],
             pub_date=row[5]
         )
-        for row in rows
-    ]
-    Review.objects.bulk_create(objs)
+        for row in stream
+    )
+    return bulk_import(Review, objs, stream,
+                       after_batch=refresh_review_ratings, **options)
 
 
-def custom_user_parser(file):
+def custom_user_parser(file, **options):
     """Парсер для модели пользователей."""
-    rows = csv_parser(file)
-    objs = [
+    stream = CsvStream(file)
+    objs = (
         CustomUser(
             id=row[0],
             username=row[1],
@@ -100,21 +221,22 @@ def custom_user_parser(file):
             first_name=row[5],
             last_name=row[6]
         )
-        for row in rows
-    ]
-    CustomUser.objects.bulk_create(objs)
+        for row in stream
+    )
+    return bulk_import(CustomUser, objs, stream, **options)
 
 
-def comment_parser(file):
+def comment_parser(file, **options):
     """Парсер для модели комментариев."""
-    rows = csv_parser(file)
-    objs = [
+    stream = CsvStream(file)
+    objs = (
         Comment(
+            id=row[0],
             review_id=row[1],
             text=row[2],
             author_id=row[3],
             pub_date=row[4]
         )
-        for row in rows
-    ]
-    Comment.objects.bulk_create(objs)
+        for row in stream
+    )
+    return bulk_import(Comment, objs, stream, **options)
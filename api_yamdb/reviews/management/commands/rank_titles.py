@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from reviews.cache import bump_catalogue_version
+from reviews.models import TitleRanking
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт таблицы рейтингов для ?ordering=rating '
+            'и /api/v1/titles/trending/. Запускайте периодически, '
+            'чтобы старые отзывы выпадали из популярности.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Число произведений в одной транзакции.')
+
+    def handle(self, *args, **options):
+        rebuilt = TitleRanking.objects.rebuild(
+            batch_size=options['batch_size']
+        )
+        bump_catalogue_version()
+        self.stdout.write(f'Пересчитаны рейтинги произведений: {rebuilt}')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.cache import bump_catalogue_version
+from reviews.models import Title, TitleRanking
+
+
+class Command(BaseCommand):
+    help = ('Пересчёт рейтингов произведений по отзывам и таблицы '
+            'рейтингов для сортировок.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            updated = Title.objects.all().refresh_ratings()
+        # Таблица рейтингов строится из пересчитанных сумм оценок.
+        TitleRanking.objects.rebuild()
+        bump_catalogue_version()
+        self.stdout.write(f'Пересчитаны рейтинги произведений: {updated}')
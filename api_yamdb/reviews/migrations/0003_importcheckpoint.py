@@ -0,0 +1,23 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.CharField(max_length=512, unique=True, verbose_name='файл')),
+                ('offset', models.BigIntegerField(default=0, verbose_name='смещение в байтах')),
+                ('rows', models.BigIntegerField(default=0, verbose_name='загружено строк')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='дата обновления')),
+            ],
+        ),
+    ]
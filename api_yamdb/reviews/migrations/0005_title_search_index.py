@@ -0,0 +1,72 @@
+from django.db import migrations
+from django.db.utils import OperationalError
+
+SQLITE_FORWARD = (
+    "CREATE VIRTUAL TABLE reviews_title_fts USING fts5("
+    "name, description, content='reviews_title', content_rowid='id')",
+    "CREATE TRIGGER reviews_title_fts_insert AFTER INSERT ON reviews_title "
+    "BEGIN INSERT INTO reviews_title_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER reviews_title_fts_delete AFTER DELETE ON reviews_title "
+    "BEGIN INSERT INTO reviews_title_fts"
+    "(reviews_title_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER reviews_title_fts_update AFTER UPDATE OF name, description "
+    "ON reviews_title BEGIN INSERT INTO reviews_title_fts"
+    "(reviews_title_fts, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO reviews_title_fts(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO reviews_title_fts(reviews_title_fts) VALUES ('rebuild')",
+)
+SQLITE_BACKWARD = (
+    'DROP TRIGGER IF EXISTS reviews_title_fts_insert',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_delete',
+    'DROP TRIGGER IF EXISTS reviews_title_fts_update',
+    'DROP TABLE IF EXISTS reviews_title_fts',
+)
+POSTGRESQL_FORWARD = (
+    "CREATE INDEX reviews_title_search_idx ON reviews_title USING GIN ("
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(description, '')))",
+)
+POSTGRESQL_BACKWARD = (
+    'DROP INDEX IF EXISTS reviews_title_search_idx',
+)
+
+
+def run(schema_editor, statements):
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run(schema_editor, POSTGRESQL_FORWARD)
+    elif vendor == 'sqlite':
+        try:
+            run(schema_editor, SQLITE_FORWARD[:1])
+        except OperationalError:
+            # SQLite собран без FTS5: работает триграммный поиск.
+            return
+        run(schema_editor, SQLITE_FORWARD[1:])
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        run(schema_editor, POSTGRESQL_BACKWARD)
+    elif vendor == 'sqlite':
+        run(schema_editor, SQLITE_BACKWARD)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_review_comment_pub_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-18 03:20
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_rankings(apps, schema_editor):
+    # Популярность посчитает команда rank_titles.
+    Title = apps.get_model('reviews', 'Title')
+    TitleRanking = apps.get_model('reviews', 'TitleRanking')
+    titles = Title.objects.values_list('pk', 'rating_sum', 'rating_count')
+    TitleRanking.objects.bulk_create(
+        (
+            TitleRanking(
+                title_id=pk,
+                rating=rating_sum / rating_count if rating_count else 0
+            )
+            for pk, rating_sum, rating_count in titles.iterator()
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_title_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='reviews.Title', verbose_name='произведение')),
+                ('rating', models.FloatField(default=0, verbose_name='средняя оценка')),
+                ('trending', models.PositiveIntegerField(default=0, verbose_name='отзывов за последние дни')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['rating', 'title'], name='ranking_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='titleranking',
+            index=models.Index(fields=['trending', 'title'], name='ranking_trending_idx'),
+        ),
+        migrations.RunPython(fill_rankings, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,12 @@
+from datetime import timedelta
+
 from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
-from django.db.models import UniqueConstraint
+from django.db import models, transaction
+from django.db.models import (Count, F, OuterRef, Subquery, Sum,
+                              UniqueConstraint)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 
 from reviews.validators import validate_year
 
@@ -26,6 +31,33 @@ class Genre(models.Model):
         return self.name
 
 
+class TitleQuerySet(models.QuerySet):
+    """Запросы к произведениям."""
+
+    def change_rating(self, score_delta, count_delta):
+        """Инкрементально сдвигаем сумму и число оценок."""
+        return self.update(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta
+        )
+
+    def refresh_ratings(self):
+        """Пересчитываем сумму и число оценок по отзывам с нуля."""
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        return self.update(
+            rating_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum('score')).values('total')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(reviews.annotate(total=Count('pk')).values('total')),
+                0
+            )
+        )
+
+
 class Title(models.Model):
     """Произведение, на которое пишут отзывы."""
     name = models.CharField(max_length=256,
@@ -50,11 +82,57 @@ class Title(models.Model):
                                    verbose_name='описание произведения',
                                    help_text='Введите краткое описание'
                                    )
+    rating_sum = models.PositiveIntegerField(default=0,
+                                             editable=False,
+                                             verbose_name='сумма оценок')
+    rating_count = models.PositiveIntegerField(default=0,
+                                               editable=False,
+                                               verbose_name='число оценок')
+
+    objects = TitleQuerySet.as_manager()
+
+    @property
+    def rating(self):
+        """Средняя оценка, None если отзывов нет."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
 
     def __str__(self):
         return self.name
 
 
+class GenreTitleQuerySet(models.QuerySet):
+    """Запросы к связям произведений и жанров."""
+
+    def set_genres(self, genres_by_title):
+        """
+        Приводим жанры произведений к заданным: удаляем лишние связи
+        и добавляем недостающие одним bulk_create. Кэш каталога
+        сбрасывает вызывающий код.
+        """
+        if not genres_by_title:
+            return
+        wanted = {
+            (title_id, genre.pk)
+            for title_id, genres in genres_by_title.items()
+            for genre in genres
+        }
+        current = {
+            (title_id, genre_id): pk
+            for pk, title_id, genre_id in self.filter(
+                title__in=genres_by_title
+            ).values_list('pk', 'title_id', 'genre_id')
+        }
+        stale = [pk for pair, pk in current.items() if pair not in wanted]
+        if stale:
+            self.filter(pk__in=stale).delete()
+        self.bulk_create(
+            GenreTitle(title_id=title_id, genre_id=genre_id)
+            for title_id, genre_id in wanted.difference(current)
+        )
+
+
 class GenreTitle(models.Model):
     """Модель для связи произведения и жанра."""
     title = models.ForeignKey(
@@ -68,6 +146,8 @@ class GenreTitle(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = GenreTitleQuerySet.as_manager()
+
 
 class Review(models.Model):
     """Отзывы пользователей о произведениях."""
@@ -83,12 +163,18 @@ class Review(models.Model):
         default=0,
         validators=[MinValueValidator(1), MaxValueValidator(10)],
         verbose_name='оценка')
-    pub_date = models.DateTimeField(auto_now_add=True,
+    # Не auto_now_add: импорт сохраняет даты из csv как есть.
+    pub_date = models.DateTimeField(default=timezone.now, editable=False,
                                     db_index=True,
                                     verbose_name='дата публикации')
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            # Отзывы тайтла по убыванию даты, в том числе курсором.
+            models.Index(fields=['title', '-pub_date', '-id'],
+                         name='review_title_pub_date_idx'),
+        ]
         constraints = [
             UniqueConstraint(
                 fields=['title', 'author'],
@@ -99,6 +185,45 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Запоминаем оценку и произведение из БД, чтобы при правке
+        сдвинуть рейтинг.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        instance._loaded_title_id = instance.__dict__.get('title_id')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняем отзыв и рейтинг произведения в одной транзакции."""
+        adding = self._state.adding
+        loaded_score = getattr(self, '_loaded_score', None)
+        loaded_title_id = getattr(self, '_loaded_title_id', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Title.objects.filter(pk=self.title_id).change_rating(
+                    self.score, 1
+                )
+            elif loaded_score is None or loaded_title_id is None:
+                Title.objects.filter(pk=self.title_id).refresh_ratings()
+            elif self.title_id != loaded_title_id:
+                # Отзыв перенесён: оценка уходит к новому произведению.
+                Title.objects.filter(pk=loaded_title_id).change_rating(
+                    -loaded_score, -1
+                )
+                Title.objects.filter(pk=self.title_id).change_rating(
+                    self.score, 1
+                )
+            elif self.score != loaded_score:
+                Title.objects.filter(pk=self.title_id).change_rating(
+                    self.score - loaded_score, 0
+                )
+        self._loaded_score = self.score
+        self._loaded_title_id = self.title_id
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -111,12 +236,103 @@ class Comment(models.Model):
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
         related_name='comments',
         verbose_name='автор')
-    pub_date = models.DateTimeField(auto_now_add=True,
+    # Не auto_now_add: импорт сохраняет даты из csv как есть.
+    pub_date = models.DateTimeField(default=timezone.now, editable=False,
                                     db_index=True,
                                     verbose_name='дата публикации')
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            # Комментарии отзыва по убыванию даты, в том числе курсором.
+            models.Index(fields=['review', '-pub_date', '-id'],
+                         name='comment_review_pub_date_idx'),
+        ]
 
     def __str__(self):
         return self.text
+
+
+class TitleRankingQuerySet(models.QuerySet):
+    """Запросы к таблице рейтингов."""
+
+    def rebuild(self, title_ids=None, batch_size=1000):
+        """
+        Пересчитываем строки рейтинга: среднюю оценку берём из
+        денормализованных полей произведения, популярность - число
+        отзывов за последние TRENDING_DAYS дней.
+        """
+        since = timezone.now() - timedelta(days=settings.TRENDING_DAYS)
+        titles = Title.objects.order_by('pk').values_list(
+            'pk', 'rating_sum', 'rating_count'
+        )
+        if title_ids is not None:
+            titles = titles.filter(pk__in=title_ids)
+        rebuilt = 0
+        last_pk = 0
+        while True:
+            batch = list(titles.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                return rebuilt
+            last_pk = batch[-1][0]
+            ids = [pk for pk, _, _ in batch]
+            recent = dict(
+                Review.objects.filter(title__in=ids, pub_date__gte=since)
+                .order_by().values('title').annotate(total=Count('pk'))
+                .values_list('title', 'total')
+            )
+            rankings = [
+                TitleRanking(
+                    title_id=pk,
+                    rating=rating_sum / rating_count if rating_count else 0,
+                    trending=recent.get(pk, 0)
+                )
+                for pk, rating_sum, rating_count in batch
+            ]
+            with transaction.atomic():
+                self.filter(title__in=ids).delete()
+                self.bulk_create(rankings, ignore_conflicts=True)
+            rebuilt += len(rankings)
+            if len(batch) < batch_size:
+                return rebuilt
+
+
+class TitleRanking(models.Model):
+    """
+    Рейтинг и популярность произведения для сортировки по индексу.
+    Без оценок рейтинг равен 0 и сортируется как наименьший.
+    """
+    title = models.OneToOneField(Title, on_delete=models.CASCADE,
+                                 primary_key=True, related_name='ranking',
+                                 verbose_name='произведение')
+    rating = models.FloatField(default=0, verbose_name='средняя оценка')
+    trending = models.PositiveIntegerField(
+        default=0, verbose_name='отзывов за последние дни'
+    )
+
+    objects = TitleRankingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['rating', 'title'],
+                         name='ranking_rating_idx'),
+            models.Index(fields=['trending', 'title'],
+                         name='ranking_trending_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.rating}'
+
+
+class ImportCheckpoint(models.Model):
+    """Позиция, до которой csv файл загружен командой import_data."""
+    file = models.CharField(max_length=512, unique=True,
+                            verbose_name='файл')
+    offset = models.BigIntegerField(default=0,
+                                    verbose_name='смещение в байтах')
+    rows = models.BigIntegerField(default=0, verbose_name='загружено строк')
+    updated = models.DateTimeField(auto_now=True,
+                                   verbose_name='дата обновления')
+
+    def __str__(self):
+        return f'{self.file}: {self.rows}'
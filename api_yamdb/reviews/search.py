@@ -0,0 +1,154 @@
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection
+
+from .cache import get_titles_version, index_expired
+
+FTS_TABLE = 'reviews_title_fts'
+# То же выражение использует GIN-индекс из миграции 0005.
+PG_DOCUMENT = (
+    "to_tsvector('simple', coalesce(name, '') || ' ' || "
+    "coalesce(description, ''))"
+)
+
+WORD_RE = re.compile(r'\w+')
+
+
+def words(text):
+    return WORD_RE.findall(text.lower())
+
+
+def trigrams(text):
+    """Триграммы слов текста с границами слов."""
+    result = set()
+    for word in words(text):
+        padded = f'  {word} '
+        result.update(
+            padded[index:index + 3] for index in range(len(padded) - 2)
+        )
+    return result
+
+
+class TrigramIndex:
+    """
+    Запасной поиск без поддержки в БД: инвертированный индекс
+    триграмм в памяти процесса. Перестраивается при смене версии
+    произведений (новые отзывы индекс не сбрасывают) и по возрасту.
+    """
+    # Доля триграмм запроса, которая должна найтись в произведении.
+    min_similarity = 0.5
+    # Совпадение в названии важнее совпадения в описании.
+    name_weight = 2
+    description_weight = 1
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.loaded_at = None
+        self.postings = {}
+
+    def build(self):
+        from .models import Title
+
+        postings = defaultdict(dict)
+        titles = Title.objects.values_list('pk', 'name', 'description')
+        for pk, name, description in titles.iterator():
+            for gram in trigrams(description or ''):
+                postings[gram][pk] = self.description_weight
+            for gram in trigrams(name):
+                postings[gram][pk] = self.name_weight
+        return dict(postings)
+
+    def refresh(self):
+        version = get_titles_version()
+        if version != self.version or index_expired(self.loaded_at):
+            with self.lock:
+                if (version != self.version
+                        or index_expired(self.loaded_at)):
+                    self.postings = self.build()
+                    self.version = version
+                    self.loaded_at = time.monotonic()
+
+    def search(self, term, limit):
+        self.refresh()
+        grams = trigrams(term)
+        if not grams:
+            return []
+        matches = Counter()
+        scores = Counter()
+        for gram in grams:
+            postings = self.postings.get(gram, {})
+            matches.update(postings.keys())
+            scores.update(postings)
+        needed = len(grams) * self.min_similarity
+        return [
+            pk for pk, score in scores.most_common()
+            if matches[pk] >= needed
+        ][:limit]
+
+
+trigram_index = TrigramIndex()
+
+# Наличие FTS5 по базам: схема за время жизни процесса не меняется.
+fts_tables = {}
+
+
+def fts_available():
+    """Есть ли в БД таблица FTS5: SQLite может быть собран без неё."""
+    name = connection.settings_dict['NAME']
+    if name not in fts_tables:
+        fts_tables[name] = (
+            FTS_TABLE in connection.introspection.table_names()
+        )
+    return fts_tables[name]
+
+
+def search_sqlite(term, limit):
+    query = ' '.join(f'"{word}"*' for word in words(term))
+    if not query:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}) LIMIT %s',
+            [query, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_postgresql(term, limit):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT id FROM reviews_title, '
+            f"plainto_tsquery('simple', %s) query "
+            f'WHERE {PG_DOCUMENT} @@ query '
+            f'ORDER BY ts_rank({PG_DOCUMENT}, query) DESC, id LIMIT %s',
+            [term, limit]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_backend():
+    """Поиск средствами БД, если они есть, иначе триграммы."""
+    backend = settings.TITLE_SEARCH_BACKEND
+    if backend == 'auto':
+        if connection.vendor == 'postgresql':
+            backend = 'postgresql'
+        elif connection.vendor == 'sqlite' and fts_available():
+            backend = 'sqlite'
+        else:
+            backend = 'trigram'
+    return {
+        'postgresql': search_postgresql,
+        'sqlite': search_sqlite,
+        'trigram': trigram_index.search,
+    }[backend]
+
+
+def search_titles(term, limit=None):
+    """id произведений по убыванию релевантности."""
+    return get_backend()(term, limit or settings.TITLE_SEARCH_LIMIT)
@@ -0,0 +1,172 @@
+import threading
+import weakref
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import (SHARED_CHANGED_KEY, bump_catalogue_version,
+                    bump_titles_version, review_comments_key,
+                    title_reviews_key, touch)
+from .models import (Category, Comment, Genre, GenreTitle, Review, Title,
+                     TitleRanking)
+from .suggest import payload, suggest_index
+
+SUGGEST_KINDS = {Title: 'title', Genre: 'genre', Category: 'category'}
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """Убираем оценку удалённого отзыва из рейтинга произведения."""
+    score = getattr(instance, '_loaded_score', None)
+    if score is None:
+        score = instance.score
+    Title.objects.filter(pk=instance.title_id).change_rating(-score, -1)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def catalogue_changed(sender, **kwargs):
+    """Сбрасываем кэш каталога после фиксации транзакции."""
+    transaction.on_commit(bump_catalogue_version)
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def titles_changed(sender, **kwargs):
+    """Поисковый индекс в памяти зависит только от произведений."""
+    transaction.on_commit(bump_titles_version)
+
+
+def review_title_ids(review):
+    """
+    Произведения, которых касается запись отзыва. post_save приходит
+    до того, как save() запомнит новое произведение.
+    """
+    loaded = getattr(review, '_loaded_title_id', None)
+    if loaded is None or loaded == review.title_id:
+        return [review.title_id]
+    return [loaded, review.title_id]
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def reviews_changed(sender, instance, **kwargs):
+    """Меняем ETag отзывов произведения, при переносе - обоих."""
+    for title_id in review_title_ids(instance):
+        key = title_reviews_key(title_id)
+        transaction.on_commit(lambda key=key: touch(key))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def comments_changed(sender, instance, **kwargs):
+    """Меняем ETag комментариев к отзыву."""
+    key = review_comments_key(instance.review_id)
+    transaction.on_commit(lambda: touch(key))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def username_changed(sender, instance, created, **kwargs):
+    """Из пользователя в отзывы и комментарии попадает только имя."""
+    if created or instance.username == getattr(
+            instance, '_loaded_username', None):
+        return
+    instance._loaded_username = instance.username
+    transaction.on_commit(lambda: touch(SHARED_CHANGED_KEY))
+
+
+@receiver(post_delete, sender=Title)
+def title_deleted(sender, instance, **kwargs):
+    """Старый ETag отзывов удалённого тайтла не должен дать 304."""
+    key = title_reviews_key(instance.pk)
+    transaction.on_commit(lambda: touch(key))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted_comments(sender, instance, **kwargs):
+    """Старый ETag комментариев удалённого отзыва не должен дать 304."""
+    key = review_comments_key(instance.pk)
+    transaction.on_commit(lambda: touch(key))
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def suggest_saved(sender, instance, **kwargs):
+    """Обновляем индекс подсказок после фиксации транзакции."""
+    kind = SUGGEST_KINDS[sender]
+    item = payload(kind, instance)
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.changed(kind, pk, item))
+
+
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Category)
+def suggest_deleted(sender, instance, **kwargs):
+    kind = SUGGEST_KINDS[sender]
+    pk = instance.pk
+    transaction.on_commit(lambda: suggest_index.changed(kind, pk))
+
+
+# Пересчёт рейтингов, ждущий фиксации транзакции в этом потоке.
+# Подключения Django свои у каждого потока, поэтому реестр тоже.
+# Сильную ссылку держит только очередь on_commit: при откате Django
+# выбрасывает колбэк, и слабая ссылка в реестре сама становится пустой.
+pending_ranking = threading.local()
+
+
+class RankingRebuild:
+    """
+    Пересчёт строк рейтинга после фиксации: один на транзакцию для всех
+    затронутых произведений, а не на каждый отзыв.
+    """
+
+    def __init__(self):
+        self.title_ids = set()
+
+    def __call__(self):
+        pending_ranking.rebuild = None
+        TitleRanking.objects.rebuild(self.title_ids)
+        # Сортировки по рейтингу кэшируются: версию меняем после пересчёта.
+        bump_catalogue_version()
+
+
+def schedule_ranking(title_id):
+    """Добавляем произведение в пересчёт текущей транзакции."""
+    ref = getattr(pending_ranking, 'rebuild', None)
+    rebuild = ref() if ref is not None else None
+    if rebuild is not None:
+        rebuild.title_ids.add(title_id)
+        return
+    rebuild = RankingRebuild()
+    rebuild.title_ids.add(title_id)
+    pending_ranking.rebuild = weakref.ref(rebuild)
+    # Вне транзакции колбэк выполняется сразу и очищает реестр.
+    transaction.on_commit(rebuild)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def ranking_changed(sender, instance, **kwargs):
+    """Пересчитываем строку рейтинга произведения после фиксации."""
+    for title_id in review_title_ids(instance):
+        schedule_ranking(title_id)
+
+
+@receiver(post_save, sender=Title)
+def title_ranked(sender, instance, created, **kwargs):
+    """Новое произведение сразу попадает в сортировку по рейтингу."""
+    if created:
+        schedule_ranking(instance.pk)
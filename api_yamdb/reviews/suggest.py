@@ -0,0 +1,115 @@
+import threading
+import time
+from bisect import bisect_left, insort
+
+from .cache import bump_suggest_version, get_suggest_version, index_expired
+
+
+def normalize(text):
+    return ' '.join(text.lower().split())
+
+
+def name_keys(name):
+    """Ключи для поиска по началу названия и по началу любого его слова."""
+    words = normalize(name).split(' ')
+    return sorted({' '.join(words[index:]) for index in range(len(words))})
+
+
+def payload(kind, instance):
+    """Короткое описание объекта в ответе подсказок."""
+    if kind == 'title':
+        return {'type': kind, 'id': instance.pk, 'name': instance.name}
+    return {'type': kind, 'slug': instance.slug, 'name': instance.name}
+
+
+class SuggestIndex:
+    """
+    Отсортированный список ключей названий в памяти процесса.
+    Поиск по префиксу - бинарный поиск без обращений к БД. Чужие
+    изменения видны по версии в общем кэше, с LocMemCache - по возрасту.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.loaded_at = None
+        self.entries = []
+        self.items = {}
+
+    @staticmethod
+    def querysets():
+        from .models import Category, Genre, Title
+
+        return {
+            'title': Title.objects.only('pk', 'name'),
+            'genre': Genre.objects.only('pk', 'name', 'slug'),
+            'category': Category.objects.only('pk', 'name', 'slug'),
+        }
+
+    def load(self):
+        entries = []
+        items = {}
+        for kind, queryset in self.querysets().items():
+            for instance in queryset.iterator():
+                keys = name_keys(instance.name)
+                items[kind, instance.pk] = (keys, payload(kind, instance))
+                entries.extend((key, kind, instance.pk) for key in keys)
+        entries.sort()
+        self.entries = entries
+        self.items = items
+
+    def refresh(self):
+        """Перестраиваем индекс, если названия менял кто-то другой."""
+        version = get_suggest_version()
+        if version != self.version or index_expired(self.loaded_at):
+            with self.lock:
+                if (version != self.version
+                        or index_expired(self.loaded_at)):
+                    self.load()
+                    self.version = version
+                    self.loaded_at = time.monotonic()
+
+    def remove(self, kind, pk):
+        keys, _ = self.items.pop((kind, pk), ((), None))
+        for key in keys:
+            index = bisect_left(self.entries, (key, kind, pk))
+            del self.entries[index]
+
+    def add(self, kind, pk, item):
+        keys = name_keys(item['name'])
+        self.items[kind, pk] = (keys, item)
+        for key in keys:
+            insort(self.entries, (key, kind, pk))
+
+    def changed(self, kind, pk, item=None):
+        """Применяем изменение на месте; item=None - объект удалён."""
+        with self.lock:
+            if self.version is not None:
+                self.remove(kind, pk)
+                if item is not None:
+                    self.add(kind, pk, item)
+            version = bump_suggest_version()
+            if self.version is not None and version == self.version + 1:
+                self.version = version
+
+    def search(self, prefix, limit, kinds=None):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.refresh()
+        result = []
+        seen = set()
+        with self.lock:
+            start = bisect_left(self.entries, (prefix,))
+            for index in range(start, len(self.entries)):
+                key, kind, pk = self.entries[index]
+                if not key.startswith(prefix) or len(result) == limit:
+                    break
+                if (kinds and kind not in kinds) or (kind, pk) in seen:
+                    continue
+                seen.add((kind, pk))
+                result.append(self.items[kind, pk][1])
+        return result
+
+
+suggest_index = SuggestIndex()
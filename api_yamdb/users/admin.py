@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import CustomUser
+from .models import CustomUser, OutgoingEmail
 
 
 class CustomUserAdmin(admin.ModelAdmin):
@@ -12,4 +12,15 @@ class CustomUserAdmin(admin.ModelAdmin):
     empty_value_display = '-пусто-'
 
 
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    """Очередь писем. Текст не показываем: в нём коды подтверждения."""
+    list_display = ('subject', 'to', 'status', 'attempts', 'created',
+                    'sent_at')
+    exclude = ('body',)
+    list_filter = ('status',)
+    search_fields = ('to',)
+    empty_value_display = '-пусто-'
+
+
 admin.site.register(CustomUser, CustomUserAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
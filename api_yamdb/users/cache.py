@@ -0,0 +1,27 @@
+from django.core.cache import cache
+
+from reviews.cache import bump_counter, get_counter
+
+# Меняется при массовых изменениях пользователей в обход сигналов:
+# queryset.update(), bulk_update() и импорт с --on-conflict=update.
+USERS_VERSION_KEY = 'users:version'
+
+
+def get_users_version():
+    return get_counter(USERS_VERSION_KEY)
+
+
+def bump_users_version():
+    """Сбрасываем кэш аутентификации всех пользователей."""
+    return bump_counter(USERS_VERSION_KEY)
+
+
+def user_cache_key(user_id, version=None):
+    if version is None:
+        version = get_users_version()
+    return f'users:auth:{version}:{user_id}'
+
+
+def invalidate_user(user_id):
+    """Убираем пользователя из кэша аутентификации."""
+    cache.delete(user_cache_key(user_id))
@@ -0,0 +1,39 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.outbox import deliver_pending, purge_sent
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправка писем из очереди и удаление старых отправленных. '
+        'Нужна в любом режиме EMAIL_QUEUE_MODE: повторы после ошибок '
+        'отправляет только она.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Отправить накопившиеся письма и выйти.')
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.EMAIL_QUEUE_BATCH_SIZE)
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help='Пауза между проверками очереди, с.')
+
+    def handle(self, *args, **options):
+        purged_at = None
+        while True:
+            if (purged_at is None or time.monotonic() - purged_at
+                    >= settings.EMAIL_QUEUE_PURGE_INTERVAL):
+                purged = purge_sent()
+                purged_at = time.monotonic()
+                if purged:
+                    self.stdout.write(f'Удалено отправленных: {purged}')
+            sent = deliver_pending(options['batch_size'])
+            if sent:
+                self.stdout.write(f'Обработано писем: {sent}')
+            if options['once']:
+                return
+            if not sent:
+                time.sleep(options['interval'])
@@ -1,10 +1,24 @@
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
+from .cache import bump_users_version
 from .validators import validate_username
 
 
-class CustomUserManager(BaseUserManager):
+class CustomUserQuerySet(models.QuerySet):
+
+    def update(self, **kwargs):
+        """
+        update() и bulk_update() идут в обход сигналов: сбрасываем
+        кэш аутентификации всех пользователей после фиксации.
+        """
+        rows = super().update(**kwargs)
+        transaction.on_commit(bump_users_version)
+        return rows
+
+
+class CustomUserManager(BaseUserManager.from_queryset(CustomUserQuerySet)):
     """Описываем кастомную модель пользователя."""
 
     def create_user(self, email, username, role='', bio='', password=None):
@@ -104,6 +118,13 @@ class CustomUser(AbstractBaseUser):
         return (self.role in (UserRole.ADMIN, UserRole.MODERATOR)
                 or self.is_superuser)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запоминаем имя из БД: оно видно в отзывах и комментариях."""
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_username = instance.__dict__.get('username')
+        return instance
+
     def __str__(self):
         return self.username
 
@@ -112,3 +133,42 @@ class CustomUser(AbstractBaseUser):
 
     def has_module_perms(self, app_label):
         return True
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    subject = models.CharField(max_length=255, verbose_name='тема')
+    body = models.TextField(verbose_name='текст')
+    to = models.TextField(verbose_name='получатели')
+    status = models.CharField(choices=STATUS_CHOICES, default=PENDING,
+                              max_length=16, verbose_name='статус')
+    attempts = models.PositiveIntegerField(default=0,
+                                           verbose_name='попыток отправки')
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='следующая попытка'
+    )
+    last_error = models.TextField(blank=True,
+                                  verbose_name='последняя ошибка')
+    created = models.DateTimeField(auto_now_add=True,
+                                   verbose_name='дата создания')
+    sent_at = models.DateTimeField(null=True, blank=True,
+                                   verbose_name='дата отправки')
+
+    class Meta:
+        ordering = ('id',)
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'],
+                         name='outgoing_email_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.subject} -> {self.to}'
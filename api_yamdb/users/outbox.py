@@ -0,0 +1,177 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+MODE_SYNC = 'sync'
+MODE_THREAD = 'thread'
+MODE_WORKER = 'worker'
+
+_executor = None
+
+
+def queue_email(subject, body, to):
+    """
+    Кладём письмо в очередь. Отправка после фиксации транзакции:
+    sync - сразу, thread - в пуле потоков, worker - командой send_emails.
+    Повторы после ошибок при sync и thread сами не запускаются: их
+    отправляет следующая доставка, поэтому send_emails нужен всегда.
+    """
+    email = OutgoingEmail.objects.create(
+        subject=subject, body=body, to=','.join(to)
+    )
+    transaction.on_commit(dispatch)
+    return email
+
+
+def dispatch():
+    """Запускаем доставку согласно EMAIL_QUEUE_MODE."""
+    mode = settings.EMAIL_QUEUE_MODE
+    if mode == MODE_SYNC:
+        deliver_pending()
+    elif mode == MODE_THREAD:
+        get_executor().submit(deliver_in_thread).add_done_callback(
+            log_failure
+        )
+
+
+def log_failure(future):
+    """Исключение фоновой доставки иначе осталось бы в Future."""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error('Ошибка фоновой отправки писем', exc_info=error)
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.EMAIL_QUEUE_THREADS,
+            thread_name_prefix='outbox'
+        )
+    return _executor
+
+
+def shutdown(wait=True):
+    """Дожидаемся фоновых отправок: остановка процесса, тесты."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=wait)
+        _executor = None
+
+
+def deliver_in_thread():
+    """Доставка в потоке пула со своим подключением к БД."""
+    try:
+        deliver_pending()
+    finally:
+        connection.close()
+
+
+def backoff(attempts):
+    """Экспоненциальная задержка перед повторной попыткой."""
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Забираем пачку писем: сдвигаем следующую попытку на время аренды,
+    чтобы их не взял другой обработчик.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        emails = list(
+            OutgoingEmail.objects.select_for_update(skip_locked=True).filter(
+                status=OutgoingEmail.PENDING, next_attempt_at__lte=now
+            )[:batch_size]
+        )
+        OutgoingEmail.objects.filter(
+            pk__in=[email.pk for email in emails]
+        ).update(
+            next_attempt_at=now + timedelta(
+                seconds=settings.EMAIL_QUEUE_LEASE
+            )
+        )
+    return emails
+
+
+def send_batch(emails):
+    """Отправляем пачку через одно соединение с почтовым сервером."""
+    try:
+        mail_connection = get_connection()
+        mail_connection.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error)
+        return
+    try:
+        for email in emails:
+            message = EmailMessage(email.subject, email.body,
+                                   to=email.to.split(','),
+                                   connection=mail_connection)
+            try:
+                message.send()
+            except Exception as error:
+                mark_failed(email, error)
+            else:
+                mark_sent(email)
+    finally:
+        mail_connection.close()
+
+
+def mark_sent(email):
+    email.attempts += 1
+    email.status = OutgoingEmail.SENT
+    email.sent_at = timezone.now()
+    email.save(update_fields=['attempts', 'status', 'sent_at'])
+
+
+def mark_failed(email, error):
+    email.attempts += 1
+    email.last_error = repr(error)
+    if email.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = OutgoingEmail.FAILED
+    else:
+        email.next_attempt_at = timezone.now() + backoff(email.attempts)
+    email.save(update_fields=[
+        'attempts', 'last_error', 'status', 'next_attempt_at'
+    ])
+
+
+def deliver_pending(batch_size=None):
+    """Отправляем все письма, которым пора уйти. Возвращаем их число."""
+    batch_size = batch_size or settings.EMAIL_QUEUE_BATCH_SIZE
+    close_old_connections()
+    processed = 0
+    while True:
+        emails = claim_batch(batch_size)
+        if not emails:
+            return processed
+        send_batch(emails)
+        processed += len(emails)
+
+
+def purge_sent(keep=None):
+    """
+    Удаляем отправленные письма старше keep секунд: в них коды
+    подтверждения. Возвращаем число удалённых.
+    """
+    if keep is None:
+        keep = settings.EMAIL_QUEUE_KEEP_SENT
+    deleted, _ = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENT,
+        sent_at__lt=timezone.now() - timedelta(seconds=keep)
+    ).delete()
+    return deleted
@@ -0,0 +1,72 @@
+"""
+Накладные расходы MetricsMiddleware на один запрос.
+
+Запуск из корня репозитория:
+    SECRET_KEY=... python benchmarks/bench_metrics.py --requests 200000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+os.environ.setdefault('METRICS_ENABLED', '1')
+
+
+class Request:
+    method = 'GET'
+
+
+class Response:
+    status_code = 200
+
+
+def view(request):
+    return Response()
+
+
+view.cls = type('TitleViewSet', (), {})
+view.actions = {'get': 'list'}
+
+
+def run(handler, middleware, count):
+    request = Request()
+    started = time.perf_counter()
+    for _ in range(count):
+        if middleware is not None:
+            middleware.process_view(request, view, (), {})
+        handler(request)
+    return (time.perf_counter() - started) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200000)
+    parser.add_argument('--dir', action='store_true',
+                        help='Писать метрики в файлы METRICS_DIR.')
+    args = parser.parse_args()
+
+    import django
+    from django.conf import settings
+
+    django.setup()
+    if args.dir:
+        settings.METRICS_DIR = tempfile.mkdtemp()
+    from api.metrics import MetricsMiddleware
+
+    def get_response(request):
+        return Response()
+
+    middleware = MetricsMiddleware(get_response)
+    bare = run(get_response, None, args.requests)
+    wrapped = run(middleware, middleware, args.requests)
+    print(f'без middleware: {bare * 1e6:.2f} мкс/запрос')
+    print(f'с MetricsMiddleware: {wrapped * 1e6:.2f} мкс/запрос')
+    print(f'накладные расходы: {(wrapped - bare) * 1e6:.2f} мкс/запрос')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+Микрозамеры import_data, querysets и сериализаторов на данных
+из datagen.py. Результаты пишутся в JSON для сравнения коммитов
+(benchmarks/compare.py).
+
+Запуск из корня репозитория:
+    SECRET_KEY=... python benchmarks/bench_suite.py --titles 100000 \\
+        --reviews 1000000 --comments 1000000
+"""
+import argparse
+import os
+import tempfile
+
+from datagen import generate
+from harness import Suite, default_output, setup_django
+
+PAGE_SIZE = 10
+SERIALIZER_BATCH = 100
+
+
+def bench_import(suite, data_dir, engines, rounds):
+    """Полная загрузка каталога; база очищается перед каждым кругом."""
+    from django.core.management import call_command
+
+    def flush():
+        call_command('flush', interactive=False, verbosity=0)
+
+    with open(os.devnull, 'w') as devnull:
+        for engine in engines:
+            suite.run(
+                f'import_data[{engine}]',
+                lambda: call_command('import_data', all=True, dir=data_dir,
+                                     engine=engine, workers=1,
+                                     stdout=devnull),
+                rounds=rounds, warmup=0, setup=flush, group='import_data'
+            )
+
+
+def bench_querysets(suite, rounds):
+    from api.views import TitleViewSet
+    from reviews.models import Comment, Review, Title, TitleRanking
+    from reviews.search import search_titles
+
+    titles = Title.objects.count()
+    middle = titles // 2
+    review = Review.objects.filter(comments__isnull=False).first()
+    cases = {
+        'titles_first_page': lambda: list(
+            TitleViewSet.queryset.order_by('id')[:PAGE_SIZE]
+        ),
+        'titles_middle_page': lambda: list(
+            TitleViewSet.queryset.order_by('id')[middle:middle + PAGE_SIZE]
+        ),
+        'titles_by_rating': lambda: list(
+            TitleViewSet.queryset.filter(ranking__isnull=False).order_by(
+                '-ranking__rating', '-ranking__title'
+            )[:PAGE_SIZE]
+        ),
+        'titles_by_genre': lambda: list(
+            TitleViewSet.queryset.filter(genre__slug='drama').order_by(
+                'id'
+            )[:PAGE_SIZE]
+        ),
+        'title_reviews': lambda: list(
+            Review.objects.filter(title_id=middle or 1).select_related(
+                'author'
+            ).order_by('-pub_date', '-id')[:PAGE_SIZE]
+        ),
+        'review_comments': lambda: list(
+            Comment.objects.filter(review=review).select_related(
+                'author'
+            ).order_by('-pub_date', '-id')[:PAGE_SIZE]
+        ),
+        'search_titles': lambda: search_titles('побег', 200),
+    }
+    for name, func in cases.items():
+        suite.run(name, func, rounds=rounds, group='querysets')
+    suite.run('rankings_rebuild', TitleRanking.objects.rebuild,
+              rounds=max(1, rounds // 10), group='querysets')
+
+
+def bench_serializers(suite, rounds):
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleReadOnlySerializer, TitleSerializer)
+    from api.views import TitleViewSet
+    from reviews.models import Comment, Review
+
+    titles = list(TitleViewSet.queryset.order_by('id')[:SERIALIZER_BATCH])
+    reviews = list(Review.objects.select_related('author').order_by(
+        'id'
+    )[:SERIALIZER_BATCH])
+    comments = list(Comment.objects.select_related('author').order_by(
+        'id'
+    )[:SERIALIZER_BATCH])
+    payload = [
+        {'name': f'Новое произведение {number}', 'year': 2000,
+         'genre': ['drama', 'comedy'], 'category': 'movie'}
+        for number in range(SERIALIZER_BATCH)
+    ]
+    cases = {
+        'title_read_many': lambda: TitleReadOnlySerializer(
+            titles, many=True
+        ).data,
+        'review_read_many': lambda: ReviewSerializer(
+            reviews, many=True
+        ).data,
+        'comment_read_many': lambda: CommentSerializer(
+            comments, many=True
+        ).data,
+        'title_validate_many': lambda: TitleSerializer(
+            data=payload, many=True
+        ).is_valid(raise_exception=True),
+    }
+    extra = {'batch': SERIALIZER_BATCH}
+    for name, func in cases.items():
+        suite.run(name, func, rounds=rounds, group='serializers',
+                  extra=extra)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--import-rounds', type=int, default=1)
+    parser.add_argument('--engines', nargs='+', default=['orm', 'fast'],
+                        choices=('orm', 'fast'))
+    parser.add_argument('--data', help='Готовый каталог csv вместо '
+                                       'генерации.')
+    parser.add_argument('--output', help='Файл JSON с результатами.')
+    args = parser.parse_args()
+
+    params = {name: getattr(args, name)
+              for name in ('titles', 'reviews', 'comments', 'users', 'seed')}
+    suite = Suite('bench_suite', params)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data
+        if data_dir is None:
+            data_dir = os.path.join(tmp, 'data')
+            generate(data_dir, **params)
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        bench_import(suite, os.path.abspath(data_dir), args.engines,
+                     args.import_rounds)
+        bench_querysets(suite, args.rounds)
+        bench_serializers(suite, args.rounds)
+    suite.save(args.output or default_output('bench_suite'))
+
+
+if __name__ == '__main__':
+    main()
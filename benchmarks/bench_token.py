@@ -0,0 +1,92 @@
+"""
+Замер пропускной способности POST /api/v1/auth/token/
+при одновременных входах пользователей.
+
+Запуск из корня репозитория:
+    SECRET_KEY=... python benchmarks/bench_token.py --threads 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# Ограничения частоты запросов в замере не нужны.
+for rate in ('THROTTLE_AUTH_IP', 'THROTTLE_TOKEN_USERNAME'):
+    os.environ.setdefault(rate, '1000000/second')
+
+
+def setup_django(db_path):
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def create_users(count):
+    from django.contrib.auth.tokens import default_token_generator
+    from users.models import CustomUser
+
+    CustomUser.objects.bulk_create(
+        CustomUser(username=f'bench{number}',
+                   email=f'bench{number}@yamdb.fake', is_active=False)
+        for number in range(count)
+    )
+    users = CustomUser.objects.filter(username__startswith='bench')
+    return [
+        {'username': user.username,
+         'confirmation_code': default_token_generator.make_token(user)}
+        for user in users
+    ]
+
+
+def run(credentials, requests, threads):
+    from django.db import connection
+    from rest_framework.test import APIClient
+
+    local = threading.local()
+
+    def login(number):
+        if not hasattr(local, 'client'):
+            local.client = APIClient()
+        data = credentials[number % len(credentials)]
+        return local.client.post('/api/v1/auth/token/', data=data).status_code
+
+    def close_connection(_):
+        connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        statuses = Counter(executor.map(login, range(requests)))
+        list(executor.map(close_connection, range(threads)))
+    return statuses, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        credentials = create_users(args.users)
+        statuses, elapsed = run(credentials, args.requests, args.threads)
+    print(f'{args.requests} запросов, {args.threads} потоков, '
+          f'{elapsed:.2f} с, {args.requests / elapsed:.0f} запросов/с')
+    print('Статусы ответов:', dict(statuses))
+
+
+if __name__ == '__main__':
+    main()
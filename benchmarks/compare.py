@@ -0,0 +1,58 @@
+"""
+Сравнение двух файлов результатов bench_suite.py или load_scenario.py
+по медиане. Код выхода 1, если какой-то замер стал медленнее порога.
+
+    python benchmarks/compare.py old.json new.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        data = json.load(file)
+    return data['commit_info'].get('id', '')[:12], {
+        benchmark['fullname']: benchmark['stats']
+        for benchmark in data['benchmarks']
+    }
+
+
+def compare(old, new, threshold, field='median'):
+    """Строки (замер, было, стало, изменение в %, регрессия)."""
+    rows = []
+    for name in old.keys() & new.keys():
+        before = old[name][field]
+        after = new[name][field]
+        change = (after - before) / before * 100 if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return sorted(rows, key=lambda row: -row[3])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='Допустимое замедление в процентах.')
+    parser.add_argument('--field', default='median',
+                        choices=('min', 'median', 'mean', 'max'))
+    args = parser.parse_args()
+
+    old_commit, old = load(args.old)
+    new_commit, new = load(args.new)
+    print(f'{old_commit or args.old} -> {new_commit or args.new}, '
+          f'{args.field}, порог {args.threshold:g}%')
+    rows = compare(old, new, args.threshold, args.field)
+    for name, before, after, change, regression in rows:
+        mark = '  РЕГРЕССИЯ' if regression else ''
+        print(f'{name:<50} {before * 1000:10.3f} мс {after * 1000:10.3f} мс '
+              f'{change:+7.1f}%{mark}')
+    for name in sorted(old.keys() ^ new.keys()):
+        print(f'{name:<50} есть только в одном файле')
+    if any(row[4] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
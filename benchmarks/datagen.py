@@ -0,0 +1,170 @@
+"""
+Детерминированный генератор данных в формате static/data.
+
+Одинаковые параметры и seed дают побайтно одинаковые файлы,
+строки пишутся потоком, поэтому размер ограничен только диском:
+
+    python benchmarks/datagen.py /tmp/data --titles 1000000 \\
+        --reviews 10000000 --comments 10000000
+
+Загрузка: python manage.py import_data --all --dir /tmp/data
+"""
+import argparse
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = (
+    ('Фильм', 'movie'), ('Книга', 'book'), ('Музыка', 'music'),
+    ('Сериал', 'series'), ('Игра', 'game'),
+)
+GENRES = (
+    ('Драма', 'drama'), ('Комедия', 'comedy'), ('Вестерн', 'western'),
+    ('Фэнтези', 'fantasy'), ('Фантастика', 'sci-fi'),
+    ('Детектив', 'detective'), ('Триллер', 'thriller'),
+    ('Сказка', 'tale'), ('Гонзо', 'gonzo'), ('Роман', 'roman'),
+    ('Баллада', 'ballad'), ('Рок', 'rock'),
+)
+WORDS = (
+    'побег', 'крёстный', 'отец', 'бойцовский', 'клуб', 'полёт', 'гнездо',
+    'кукушка', 'властелин', 'колец', 'война', 'мир', 'мастер', 'маргарита',
+    'звёздные', 'войны', 'тишина', 'ягнята', 'зелёная', 'миля', 'город',
+    'ночь', 'день', 'последний', 'герой', 'тайна', 'остров', 'дорога',
+    'сердце', 'тьма', 'свет', 'долгий', 'путь', 'домой', 'история',
+)
+ROLES = ('user',) * 18 + ('moderator', 'admin')
+FIRST_YEAR = 1900
+LAST_YEAR = 2020
+START_DATE = datetime(2019, 1, 1)
+DATE_SPREAD = 3 * 365 * 24 * 3600
+
+FILES = {
+    'users.csv': ('id', 'username', 'email', 'role', 'bio', 'first_name',
+                  'last_name'),
+    'category.csv': ('id', 'name', 'slug'),
+    'genre.csv': ('id', 'name', 'slug'),
+    'titles.csv': ('id', 'name', 'year', 'category'),
+    'genre_title.csv': ('id', 'title_id', 'genre_id'),
+    'review.csv': ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+    'comments.csv': ('id', 'review_id', 'text', 'author', 'pub_date'),
+}
+
+
+def phrase(rng, low, high):
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def pub_date(rng):
+    moment = START_DATE + timedelta(seconds=rng.randrange(DATE_SPREAD))
+    return moment.strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+def user_rows(rng, users):
+    for pk in range(1, users + 1):
+        yield (pk, f'user{pk}', f'user{pk}@yamdb.fake', rng.choice(ROLES),
+               '', '', '')
+
+
+def title_rows(rng, titles):
+    for pk in range(1, titles + 1):
+        yield (pk, phrase(rng, 1, 4).capitalize(),
+               rng.randint(FIRST_YEAR, LAST_YEAR),
+               rng.randint(1, len(CATEGORIES)))
+
+
+def genre_title_rows(rng, titles):
+    pk = 0
+    for title in range(1, titles + 1):
+        for genre in sorted(rng.sample(range(1, len(GENRES) + 1),
+                                       rng.randint(1, 3))):
+            pk += 1
+            yield pk, title, genre
+
+
+def review_rows(rng, titles, reviews, users):
+    """
+    Отзыв i относится к тайтлу i % titles, автор сдвигается на
+    каждом круге - пара (тайтл, автор) уникальна, пока круг меньше users.
+    """
+    for index in range(reviews):
+        title = index % titles + 1
+        author = (title + index // titles) % users + 1
+        yield (index + 1, title, phrase(rng, 5, 30), author,
+               # Оценки смещены вверх, как у настоящих отзывов.
+               min(10, rng.randint(1, 10) + rng.randint(0, 3)),
+               pub_date(rng))
+
+
+def comment_rows(rng, reviews, comments, users):
+    for pk in range(1, comments + 1):
+        yield (pk, rng.randint(1, reviews), phrase(rng, 3, 15),
+               rng.randint(1, users), pub_date(rng))
+
+
+def generate(directory, titles=1000, reviews=10000, comments=10000,
+             users=1000, seed=0):
+    """Пишем csv в directory и возвращаем число строк по файлам."""
+    if titles < 1 or users < 1:
+        raise ValueError('Нужен хотя бы один тайтл и один пользователь.')
+    if reviews and -(-reviews // titles) > users:
+        raise ValueError(
+            'Отзывов на тайтл больше, чем пользователей: '
+            'нарушится уникальность автора отзыва.'
+        )
+    if comments and not reviews:
+        raise ValueError('Комментариям нужны отзывы.')
+    os.makedirs(directory, exist_ok=True)
+    rows = {
+        'users.csv': user_rows(random.Random(f'{seed}:users'), users),
+        'category.csv': (
+            (pk, name, slug)
+            for pk, (name, slug) in enumerate(CATEGORIES, 1)
+        ),
+        'genre.csv': (
+            (pk, name, slug) for pk, (name, slug) in enumerate(GENRES, 1)
+        ),
+        'titles.csv': title_rows(random.Random(f'{seed}:titles'), titles),
+        'genre_title.csv': genre_title_rows(
+            random.Random(f'{seed}:genres'), titles
+        ),
+        'review.csv': review_rows(
+            random.Random(f'{seed}:reviews'), titles, reviews, users
+        ),
+        'comments.csv': comment_rows(
+            random.Random(f'{seed}:comments'), reviews, comments, users
+        ),
+    }
+    counts = {}
+    for file, header in FILES.items():
+        path = os.path.join(directory, file)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(header)
+            count = 0
+            for row in rows[file]:
+                writer.writerow(row)
+                count += 1
+        counts[file] = count
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('directory')
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    counts = generate(args.directory, args.titles, args.reviews,
+                      args.comments, args.users, args.seed)
+    for file, count in counts.items():
+        print(f'{file}: {count} строк')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Общие части замеров: настройка Django на отдельной базе, статистика
+в духе pytest-benchmark и сохранение результатов в JSON.
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'api_yamdb'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+# Ограничения частоты запросов в замерах не нужны.
+for rate in ('THROTTLE_AUTH_IP', 'THROTTLE_SIGNUP_IDENTITY',
+             'THROTTLE_TOKEN_USERNAME'):
+    os.environ.setdefault(rate, '1000000/second')
+# Письма остаются в очереди: отправка не входит в замер.
+os.environ.setdefault('EMAIL_QUEUE_MODE', 'worker')
+os.environ.setdefault('METRICS_ENABLED', '0')
+
+
+def setup_django(db_path):
+    """Мигрированная база SQLite в db_path вместо рабочей."""
+    import django
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def summarize(timings):
+    """Статистика серии замеров, поля как у pytest-benchmark."""
+    ordered = sorted(timings)
+    quartiles = statistics.quantiles(ordered, n=4) if len(ordered) > 1 \
+        else ordered * 3
+    mean = statistics.fmean(ordered)
+    return {
+        'min': ordered[0],
+        'max': ordered[-1],
+        'mean': mean,
+        'stddev': statistics.stdev(ordered) if len(ordered) > 1 else 0.0,
+        'median': statistics.median(ordered),
+        'q1': quartiles[0],
+        'q3': quartiles[2],
+        'iqr': quartiles[2] - quartiles[0],
+        'rounds': len(ordered),
+        'total': sum(ordered),
+        'ops': 1 / mean if mean else 0.0,
+    }
+
+
+def percentiles(timings, percents=(50, 95, 99)):
+    ordered = sorted(timings)
+    return {
+        f'p{percent}': ordered[
+            max(0, -(-len(ordered) * percent // 100) - 1)
+        ]
+        for percent in percents
+    }
+
+
+def commit_info():
+    def git(*args):
+        try:
+            return subprocess.run(
+                ('git', *args), cwd=ROOT, capture_output=True, text=True,
+                check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ''
+
+    return {
+        'id': git('rev-parse', 'HEAD'),
+        'branch': git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+    }
+
+
+def machine_info():
+    return {
+        'node': platform.node(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'release': platform.release(),
+        'python_implementation': platform.python_implementation(),
+        'python_version': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+class Suite:
+    """
+    Набор замеров. Файл результатов совместим по структуре с
+    pytest-benchmark: machine_info, commit_info и benchmarks.
+    """
+
+    def __init__(self, name, params=None):
+        self.name = name
+        self.params = params or {}
+        self.benchmarks = []
+
+    def add(self, name, timings, group=None, extra=None):
+        stats = summarize(timings)
+        self.benchmarks.append({
+            'group': group,
+            'name': name,
+            'fullname': f'{self.name}::{name}',
+            'params': self.params,
+            'extra_info': extra or {},
+            'stats': stats,
+        })
+        print(f'{name:<40} median {stats["median"] * 1000:9.3f} мс  '
+              f'min {stats["min"] * 1000:9.3f} мс  '
+              f'rounds {stats["rounds"]}')
+        return stats
+
+    def run(self, name, func, rounds=20, warmup=1, setup=None,
+            group=None, extra=None):
+        """Замер func() rounds раз; setup() вызывается вне замера."""
+        for _ in range(warmup):
+            if setup is not None:
+                setup()
+            func()
+        timings = []
+        for _ in range(rounds):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+        return self.add(name, timings, group, extra)
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'machine_info': machine_info(),
+                'commit_info': commit_info(),
+                'datetime': datetime.now(timezone.utc).isoformat(),
+                'version': 1,
+                'benchmarks': self.benchmarks,
+            }, file, ensure_ascii=False, indent=2)
+        print(f'Результаты записаны в {path}')
+
+
+def default_output(suite):
+    """benchmarks/results/<suite>-<commit>.json"""
+    commit = commit_info()['id'][:12] or 'nocommit'
+    return os.path.join(ROOT, 'benchmarks', 'results',
+                        f'{suite}-{commit}.json')
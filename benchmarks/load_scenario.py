@@ -0,0 +1,174 @@
+"""
+Нагрузочный сценарий пользователя: регистрация -> токен -> просмотр
+произведений -> отзыв -> комментарий. Виртуальные пользователи
+работают в потоках через весь стек middleware, время каждого шага
+пишется в JSON.
+
+Запуск из корня репозитория:
+    SECRET_KEY=... python benchmarks/load_scenario.py --users 200 \\
+        --threads 8 --titles 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from datagen import generate
+from harness import Suite, default_output, percentiles, setup_django
+
+STEPS = ('signup', 'token', 'titles_page', 'title_detail', 'review',
+         'comment')
+
+
+class ScenarioError(Exception):
+
+    def __init__(self, step, response):
+        super().__init__(f'{step}: {response.status_code} {response.data}')
+        self.step = step
+
+
+class VirtualUser:
+    """Один проход сценария; время и статус каждого шага."""
+
+    def __init__(self, number, titles, pages, seed):
+        from rest_framework.test import APIClient
+
+        self.client = APIClient()
+        self.number = number
+        self.titles = titles
+        self.pages = pages
+        self.rng = random.Random(f'{seed}:{number}')
+        self.timings = []
+
+    def request(self, step, method, url, data=None, expected=200):
+        started = time.perf_counter()
+        send = getattr(self.client, method)
+        response = send(url, data=data, format='json')
+        self.timings.append((step, time.perf_counter() - started,
+                             response.status_code))
+        if response.status_code != expected:
+            raise ScenarioError(step, response)
+        return response
+
+    def confirmation_code(self, username):
+        """Код из письма: тот же генератор, что и у SignUpUserViewSet."""
+        from django.contrib.auth.tokens import default_token_generator
+        from users.models import CustomUser
+
+        user = CustomUser.objects.get(username=username)
+        return default_token_generator.make_token(user)
+
+    def run(self):
+        username = f'load{self.number}'
+        self.request('signup', 'post', '/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+        token = self.request('token', 'post', '/api/v1/auth/token/', {
+            'username': username,
+            'confirmation_code': self.confirmation_code(username),
+        }).data['token']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        for _ in range(self.pages):
+            page = self.rng.randint(1, max(1, self.titles // 10))
+            self.request('titles_page', 'get',
+                         f'/api/v1/titles/?page={page}')
+        title = self.rng.randint(1, self.titles)
+        self.request('title_detail', 'get', f'/api/v1/titles/{title}/')
+        review = self.request(
+            'review', 'post', f'/api/v1/titles/{title}/reviews/',
+            {'text': 'Отзыв из нагрузочного сценария.',
+             'score': self.rng.randint(1, 10)}, expected=201
+        ).data['id']
+        self.request(
+            'comment', 'post',
+            f'/api/v1/titles/{title}/reviews/{review}/comments/',
+            {'text': 'Комментарий из нагрузочного сценария.'},
+            expected=201
+        )
+
+
+def run(users, threads, titles, pages, seed):
+    from django.db import connection
+
+    timings = defaultdict(list)
+    statuses = Counter()
+    failures = Counter()
+    lock = threading.Lock()
+
+    def scenario(number):
+        user = VirtualUser(number, titles, pages, seed)
+        try:
+            user.run()
+        except ScenarioError as error:
+            with lock:
+                failures[error.step] += 1
+        finally:
+            connection.close()
+        with lock:
+            for step, elapsed, status in user.timings:
+                timings[step].append(elapsed)
+                statuses[f'{step} {status}'] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(scenario, range(users)))
+    return timings, statuses, failures, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument('--users', type=int, default=100,
+                        help='Число проходов сценария.')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--pages', type=int, default=3,
+                        help='Страниц списка произведений на проход.')
+    parser.add_argument('--titles', type=int, default=1000)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--comments', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Файл JSON с результатами.')
+    args = parser.parse_args()
+
+    from django.core.management import call_command
+
+    params = {name: getattr(args, name)
+              for name in ('users', 'threads', 'pages', 'titles', 'reviews',
+                           'comments', 'seed')}
+    suite = Suite('load_scenario', params)
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, 'data')
+        generate(data_dir, args.titles, args.reviews, args.comments,
+                 seed=args.seed)
+        setup_django(os.path.join(tmp, 'bench.sqlite3'))
+        with open(os.devnull, 'w') as devnull:
+            call_command('import_data', all=True, dir=data_dir,
+                         engine='fast', workers=1, stdout=devnull)
+        timings, statuses, failures, elapsed = run(
+            args.users, args.threads, args.titles, args.pages, args.seed
+        )
+    for step in STEPS:
+        if timings[step]:
+            suite.add(step, timings[step], group='load_scenario',
+                      extra=percentiles(timings[step]))
+    total = sum(len(values) for values in timings.values())
+    suite.add('scenario', [elapsed], group='load_scenario', extra={
+        'requests': total,
+        'requests_per_second': total / elapsed,
+        'statuses': dict(statuses),
+        'failures': dict(failures),
+    })
+    print(f'{total} запросов за {elapsed:.2f} с, '
+          f'{total / elapsed:.0f} запросов/с')
+    if failures:
+        print('Сбои по шагам:', dict(failures))
+    suite.save(args.output or default_output('load_scenario'))
+
+
+if __name__ == '__main__':
+    main()
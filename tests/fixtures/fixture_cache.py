@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    from reviews.search import trigram_index
+    from reviews.suggest import suggest_index
+
+    def clear():
+        cache.clear()
+        # Версии в пустом кэше могут совпасть со старыми,
+        # поэтому индексы в памяти сбрасываем явно.
+        trigram_index.version = None
+        suggest_index.version = None
+
+    clear()
+    yield
+    clear()
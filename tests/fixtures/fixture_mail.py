@@ -0,0 +1,6 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def sync_email_queue(settings):
+    settings.EMAIL_QUEUE_MODE = 'sync'
@@ -0,0 +1,79 @@
+import pytest
+from django.core.management import call_command
+
+from .common import create_reviews
+
+
+class Test08Rating:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_rating_stored_on_title(self, admin_client, admin):
+        from reviews.models import Title
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.rating_count) == (12, 3), (
+            'Проверьте, что сумма и число оценок сохраняются в произведении '
+            'при создании отзывов'
+        )
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            data={'score': 8}
+        )
+        admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        )
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (12, 2), (
+            'Проверьте, что рейтинг произведения обновляется '
+            'при изменении и удалении отзывов'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_recount_ratings(self, admin_client, admin):
+        from reviews.models import Title, TitleRanking
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        Title.objects.update(rating_sum=0, rating_count=0)
+        TitleRanking.objects.rebuild()
+        call_command('recount_ratings')
+        response = admin_client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json().get('rating') == 4, (
+            'Проверьте, что команда `recount_ratings` пересчитывает рейтинги'
+        )
+        response = admin_client.get(f'/api/v1/titles/{titles[1]["id"]}/')
+        assert response.json().get('rating') is None, (
+            'Проверьте, что рейтинг произведения без отзывов равен `None`'
+        )
+        response = admin_client.get('/api/v1/titles/?ordering=-rating')
+        assert [title['id'] for title in response.json()['results']] == [
+            titles[0]['id'], titles[1]['id']
+        ], (
+            'Проверьте, что `recount_ratings` пересчитывает и сортировку '
+            'по рейтингу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_review_moved(self, admin_client, admin):
+        from reviews.models import Review, Title, TitleRanking
+
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        old, new = (Title.objects.get(pk=title['id']) for title in titles[:2])
+        # Так отзыв переносит форма ReviewAdmin.
+        review = Review.objects.get(pk=reviews[0]['id'])
+        review.title = new
+        review.save()
+        old.refresh_from_db()
+        new.refresh_from_db()
+        assert ((old.rating_sum, old.rating_count),
+                (new.rating_sum, new.rating_count)) == ((7, 2), (5, 1)), (
+            'Проверьте, что при переносе отзыва оценка переходит '
+            'к новому произведению'
+        )
+        rankings = dict(TitleRanking.objects.filter(
+            title__in=[old, new]
+        ).values_list('title', 'rating'))
+        assert rankings == {old.pk: 3.5, new.pk: 5}, (
+            'Проверьте, что перенос отзыва пересчитывает рейтинги '
+            'обоих произведений'
+        )
@@ -0,0 +1,31 @@
+import pytest
+
+from .common import assert_query_budget, create_titles
+
+
+class Test09TitleQueries:
+
+    @staticmethod
+    def add_titles(admin_client, genres, categories, count):
+        for number in range(count):
+            data = {'name': f'Произведение {number}', 'year': 1990 + number,
+                    'genre': [genre['slug'] for genre in genres],
+                    'category': categories[number % 2]['slug']}
+            admin_client.post('/api/v1/titles/', data=data)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_fixed_query_count(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/?genre={genres[0]["slug"]}',
+            f'/api/v1/titles/?category={categories[0]["slug"]}&year=2000',
+        )
+        before = [assert_query_budget(client, url, 3) for url in urls]
+        self.add_titles(admin_client, genres, categories, 8)
+        after = [assert_query_budget(client, url, 3) for url in urls]
+        assert before == after, (
+            'Проверьте, что число запросов к БД при GET запросе '
+            '`/api/v1/titles/` не зависит от числа произведений'
+        )
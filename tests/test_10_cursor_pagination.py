@@ -0,0 +1,53 @@
+import pytest
+
+from .common import create_reviews
+
+
+class Test10CursorPagination:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_comments_cursor(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        created = [
+            admin_client.post(url, data={'text': f'Коммент {number}'}).json()
+            for number in range(15)
+        ]
+        response = client.get(f'{url}?pagination=cursor')
+        assert response.status_code == 200, (
+            f'Проверьте, что при GET запросе `{url}?pagination=cursor` '
+            'возвращается статус 200'
+        )
+        data = response.json()
+        assert 'count' not in data and 'next' in data, (
+            f'Проверьте, что при GET запросе `{url}?pagination=cursor` '
+            'используется курсорная пагинация без параметра `count`'
+        )
+        received = [comment['id'] for comment in data['results']]
+        admin_client.post(url, data={'text': 'Новый коммент'})
+        while data['next']:
+            data = client.get(data['next']).json()
+            received.extend(comment['id'] for comment in data['results'])
+        expected = [comment['id'] for comment in reversed(created)]
+        assert received == expected, (
+            f'Проверьте, что курсорная пагинация `{url}` отдаёт все записи '
+            'по убыванию даты публикации без повторов, '
+            'даже если во время обхода добавлены новые'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_reviews_page_number_by_default(self, client, admin_client,
+                                               admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = client.get(url).json()
+        assert data.get('count') == 3, (
+            f'Проверьте, что при GET запросе `{url}` без параметра '
+            '`pagination` используется постраничная пагинация'
+        )
+        data = client.get(f'{url}?pagination=cursor').json()
+        assert len(data['results']) == 3 and 'count' not in data, (
+            f'Проверьте, что при GET запросе `{url}?pagination=cursor` '
+            'используется курсорная пагинация'
+        )
@@ -0,0 +1,231 @@
+import csv
+import os
+
+import pytest
+from django.core.management import call_command
+
+from .conftest import MANAGE_PATH
+
+DATA_FILES = (
+    ('custom-user', 'users.csv'),
+    ('category', 'category.csv'),
+    ('genre', 'genre.csv'),
+    ('title', 'titles.csv'),
+    ('genre-title', 'genre_title.csv'),
+    ('review', 'review.csv'),
+    ('comment', 'comments.csv'),
+)
+
+
+def count_rows(file):
+    with open(os.path.join(MANAGE_PATH, file), newline='',
+              encoding='utf-8') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def import_static_data(**options):
+    for model, file in DATA_FILES:
+        call_command('import_data', model=model,
+                     file=f'static/data/{file}', **options)
+
+
+class Test11ImportData:
+
+    @pytest.mark.django_db(transaction=True, reset_sequences=True)
+    def test_01_import_in_batches(self, capsys):
+        from django.contrib.auth import get_user_model
+        from reviews.models import (Category, Comment, Genre, GenreTitle,
+                                    Review, Title)
+
+        import_static_data(batch_size=7)
+        models = {
+            'users.csv': get_user_model(),
+            'category.csv': Category,
+            'genre.csv': Genre,
+            'titles.csv': Title,
+            'genre_title.csv': GenreTitle,
+            'review.csv': Review,
+            'comments.csv': Comment,
+        }
+        for file, model in models.items():
+            expected = count_rows(f'static/data/{file}')
+            assert model.objects.count() == expected, (
+                f'Проверьте, что `import_data` загружает все строки '
+                f'из `{file}`'
+            )
+        assert 'строк/с' in capsys.readouterr().out, (
+            'Проверьте, что `import_data` выводит скорость загрузки'
+        )
+        title = Title.objects.filter(rating_count__gt=0).first()
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert (title.rating_sum, title.rating_count) == (
+            sum(scores), len(scores)
+        ), (
+            'Проверьте, что `import_data` обновляет рейтинги произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True, reset_sequences=True)
+    def test_02_import_all(self, capsys):
+        from django.db import connection
+        from reviews.models import Comment, Review, Title
+
+        call_command('import_data', all=True, workers=2)
+        if connection.vendor == 'sqlite':
+            assert '--workers игнорируется' in capsys.readouterr().err, (
+                'Проверьте, что на SQLite `import_data --all` грузит '
+                'данные в одном процессе и предупреждает об этом'
+            )
+        for file, model in (('titles.csv', Title), ('review.csv', Review),
+                            ('comments.csv', Comment)):
+            assert model.objects.count() == count_rows(
+                f'static/data/{file}'
+            ), (
+                'Проверьте, что `import_data --all` загружает все csv файлы '
+                'в порядке зависимостей'
+            )
+
+    @staticmethod
+    def snapshot():
+        from django.contrib.auth import get_user_model
+        from reviews.models import (Category, Comment, Genre, GenreTitle,
+                                    Review, Title)
+
+        users = get_user_model().objects.values_list(
+            'id', 'username', 'email', 'role', 'bio', 'first_name',
+            'last_name', 'is_active', 'is_staff'
+        )
+        return [list(users.order_by('id'))] + [
+            list(model.objects.order_by('id').values())
+            for model in (Category, Genre, Title, GenreTitle, Review, Comment)
+        ]
+
+    @pytest.mark.django_db(transaction=True, reset_sequences=True)
+    def test_03_fast_engine_matches_orm(self):
+        from django.contrib.auth import get_user_model
+        from reviews.models import Category, Genre, Review, Title
+
+        import_static_data()
+        expected = self.snapshot()
+        assert Review.objects.filter(pub_date__year=2019).exists(), (
+            'Проверьте, что `import_data` сохраняет даты публикации из csv'
+        )
+        get_user_model().objects.all().delete()
+        for model in (Title, Category, Genre):
+            model.objects.all().delete()
+        import_static_data(engine='fast', batch_size=5)
+        assert self.snapshot() == expected, (
+            'Проверьте, что `import_data --engine=fast` загружает те же '
+            'данные, что и импорт через ORM'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_resume_and_upsert(self, tmp_path):
+        from django.db import IntegrityError
+        from reviews.models import Category, ImportCheckpoint
+
+        file = tmp_path / 'category.csv'
+        file.write_text(
+            'id,name,slug\n'
+            '1,"Фильм,\nкино",movie\n'
+            '2,Книга,book\n'
+            '3,Дубль,movie\n',
+            encoding='utf-8'
+        )
+        with pytest.raises(IntegrityError):
+            call_command('import_data', model='category', file=str(file),
+                         batch_size=2)
+        checkpoint = ImportCheckpoint.objects.get(file=str(file))
+        assert checkpoint.rows == 2 and Category.objects.count() == 2, (
+            'Проверьте, что `import_data` сохраняет чекпоинт после каждой '
+            'загруженной пачки'
+        )
+        with open(file, 'a', encoding='utf-8') as f:
+            f.write('4,Музыка,music\n')
+        call_command('import_data', model='category', file=str(file),
+                     batch_size=2, resume=True, on_conflict='skip')
+        assert sorted(Category.objects.values_list('slug', flat=True)) == [
+            'book', 'movie', 'music'
+        ], (
+            'Проверьте, что `import_data --resume` продолжает загрузку '
+            'с чекпоинта'
+        )
+        file.write_text('id,name,slug\n2,Книги,book\n', encoding='utf-8')
+        call_command('import_data', model='category', file=str(file),
+                     on_conflict='update')
+        assert Category.objects.get(pk=2).name == 'Книги', (
+            'Проверьте, что `import_data --on-conflict=update` обновляет '
+            'существующие строки'
+        )
+
+    @pytest.mark.django_db
+    def test_05_copy_buffer_keeps_empty_strings(self):
+        import csv
+
+        from django.contrib.auth import get_user_model
+        from reviews.management.commands.parsers.fast_loaders import (
+            COPY_NULL, copy_buffer, copy_sql, table_layout
+        )
+        from reviews.management.commands.parsers.model_parsers import (
+            CsvStream
+        )
+
+        stream = CsvStream('static/data/users.csv')
+        fields, columns, defaults = table_layout(get_user_model(),
+                                                 stream.header)
+        rows = [line + defaults for line in stream]
+        lines = copy_buffer(rows).getvalue().splitlines()
+        assert f"NULL '{COPY_NULL}'" in copy_sql('users', columns), (
+            'Проверьте, что COPY получает явный маркер NULL'
+        )
+        for line, row in zip(csv.reader(lines), rows):
+            for column, raw, value in zip(columns, line, row):
+                expected = COPY_NULL if value is None else str(value)
+                assert raw == expected, (
+                    f'Проверьте, что `{column}`={value!r} попадает в COPY '
+                    'без подмены пустой строки на NULL'
+                )
+        assert any(line.count(',,') for line in lines), (
+            'Пустые bio, first_name и last_name должны остаться пустыми '
+            'строками'
+        )
+
+    @pytest.mark.django_db(transaction=True, reset_sequences=True)
+    def test_06_copy_on_postgresql(self):
+        from django.contrib.auth import get_user_model
+        from django.db import connection
+
+        if connection.vendor != 'postgresql':
+            pytest.skip('COPY выполняется только на PostgreSQL')
+        call_command('import_data', model='custom-user',
+                     file='static/data/users.csv', engine='fast')
+        user = get_user_model().objects.get(username='bingobongo')
+        assert (user.bio, user.first_name, user.password) == ('', '', ''), (
+            'Проверьте, что `import_data --engine=fast` сохраняет пустые '
+            'строки в NOT NULL колонках'
+        )
+        assert user.last_login is None
+
+    @pytest.mark.django_db(transaction=True, reset_sequences=True)
+    def test_07_fast_reviews_refresh_loaded_titles(self, tmp_path):
+        from reviews.models import Review, Title
+
+        for model, file in DATA_FILES[:4]:
+            call_command('import_data', model=model,
+                         file=f'static/data/{file}', engine='fast')
+        Title.objects.filter(pk=2).update(rating_sum=7, rating_count=1)
+        file = tmp_path / 'review.csv'
+        file.write_text(
+            'id,title_id,text,author,score,pub_date\n'
+            '1,1,Отзыв,100,8,2019-09-24T21:08:21.567Z\n',
+            encoding='utf-8'
+        )
+        call_command('import_data', model='review', file=str(file),
+                     engine='fast')
+        ratings = dict(Title.objects.filter(pk__in=(1, 2)).values_list(
+            'pk', 'rating_sum'
+        ))
+        assert ratings == {1: 8, 2: 7}, (
+            'Проверьте, что после импорта отзывов пересчитываются рейтинги '
+            'только загруженных произведений'
+        )
+        assert Review.objects.get().pub_date.year == 2019
@@ -0,0 +1,52 @@
+import pytest
+
+from .common import create_reviews, create_titles, get_with_queries
+
+
+@pytest.fixture(autouse=True)
+def api_cache(settings):
+    """В тестах один процесс: кэш ответов включаем и с LocMemCache."""
+    settings.API_CACHE_TIMEOUT = 300
+
+
+class Test12Cache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_titles_cached(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/?genre={genres[0]["slug"]}',
+            '/api/v1/categories/',
+            '/api/v1/genres/?page=1',
+        )
+        for url in urls:
+            first, _ = get_with_queries(client, url)
+            second, queries = get_with_queries(client, url)
+            assert queries == 0 and first.json() == second.json(), (
+                f'Проверьте, что повторный GET запрос `{url}` '
+                'отдаётся из кэша без запросов к БД'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cache_invalidation(self, client, admin_client, admin):
+        reviews, titles, _, _ = create_reviews(admin_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert client.get(url).json()['rating'] == 4
+        admin_client.patch(
+            f'{url}reviews/{reviews[0]["id"]}/', data={'score': 8}
+        )
+        assert client.get(url).json()['rating'] == 5, (
+            'Проверьте, что изменение отзыва сбрасывает кэш произведения'
+        )
+        admin_client.patch(url, data={'name': 'Поворот обратно'})
+        assert client.get(url).json()['name'] == 'Поворот обратно', (
+            'Проверьте, что изменение произведения сбрасывает кэш'
+        )
+        client.get('/api/v1/categories/')
+        admin_client.post('/api/v1/categories/',
+                          data={'name': 'Музыка', 'slug': 'music'})
+        assert client.get('/api/v1/categories/').json()['count'] == 3, (
+            'Проверьте, что создание категории сбрасывает кэш категорий'
+        )
@@ -0,0 +1,114 @@
+import pytest
+
+from .common import create_comments, create_titles, get_with_queries
+
+
+class Test13ConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_reviews_etag(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        urls = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+            f'{reviews[0]["id"]}/comments/',
+            '/api/v1/titles/',
+        )
+        for url in urls:
+            response = client.get(url)
+            etag = response.get('ETag')
+            assert etag, (
+                f'Проверьте, что GET запрос `{url}` возвращает заголовок ETag'
+            )
+            response, queries = get_with_queries(
+                client, url, HTTP_IF_NONE_MATCH=etag
+            )
+            assert response.status_code == 304 and queries == 0, (
+                f'Проверьте, что GET запрос `{url}` с актуальным '
+                'If-None-Match возвращает 304 без запросов к БД'
+            )
+        last_modified = client.get(urls[0]).get('Last-Modified')
+        assert last_modified, (
+            f'Проверьте, что GET запрос `{urls[0]}` возвращает Last-Modified'
+        )
+        response = client.get(urls[0], HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == 304, (
+            f'Проверьте, что GET запрос `{urls[0]}` с актуальным '
+            'If-Modified-Since возвращает 304'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_etag_changes_on_write(self, client, admin_client, admin):
+        comments, reviews, titles, _, _ = create_comments(admin_client, admin)
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{reviews[0]["id"]}/comments/')
+        etag = client.get(url)['ETag']
+        admin_client.patch(f'{url}{comments[0]["id"]}/',
+                           data={'text': 'Новый текст'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что после изменения комментария GET запрос `{url}` '
+            'со старым ETag возвращает 200'
+        )
+        etag = response['ETag']
+        admin_client.patch('/api/v1/users/TestUser/',
+                           data={'first_name': 'Имя'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304, (
+            'Проверьте, что поля пользователя, которых нет в ответе, '
+            f'не меняют ETag GET запроса `{url}`'
+        )
+        admin_client.patch('/api/v1/users/TestUser/',
+                           data={'username': 'RenamedUser'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            f'Проверьте, что после переименования автора GET запрос `{url}` '
+            'со старым ETag возвращает 200'
+        )
+        results = response.json()['results']
+        assert 'RenamedUser' in {comment['author'] for comment in results}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_change_times_expire(self, settings, monkeypatch):
+        from django.core.cache import cache
+        from reviews.cache import get_change_times, touch
+
+        settings.CHANGE_TIMES_TIMEOUT = 60
+        calls = []
+        set_value = cache.set
+
+        def spy(key, value, timeout=None, **kwargs):
+            calls.append(timeout)
+            return set_value(key, value, timeout, **kwargs)
+
+        monkeypatch.setattr(cache, 'set', spy)
+        touch('test:changed')
+        assert calls == [60], (
+            'Проверьте, что метки изменений хранятся ограниченное время'
+        )
+        assert get_change_times('test:changed')
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_catalogue_version_expires(self, client, admin_client,
+                                          settings, monkeypatch):
+        import time
+
+        from reviews.models import Title
+
+        settings.CATALOGUE_VERSION_TIMEOUT = 60
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        etag = client.get(url)['ETag']
+        # Запись обработал другой воркер: версия сменилась только в его
+        # кэше, а этот процесс о ней не знает.
+        Title.objects.filter(pk=titles[0]['id']).update(name='Другое')
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        now = time.time()
+        monkeypatch.setattr(time, 'time', lambda: now + 61)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что версия каталога истекает и чужая запись '
+            'не даёт 304 по старому ETag бесконечно'
+        )
+        assert response.json()['name'] == 'Другое'
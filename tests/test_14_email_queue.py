@@ -0,0 +1,118 @@
+import pytest
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+
+
+class FailingBackend(BaseEmailBackend):
+
+    def send_messages(self, email_messages):
+        raise ConnectionError('SMTP недоступен')
+
+
+def signup(client, username):
+    return client.post('/api/v1/auth/signup/', data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    })
+
+
+class Test14EmailQueue:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_thread_mode(self, client, settings):
+        from users import outbox
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_QUEUE_MODE = 'thread'
+        response = signup(client, 'threaded')
+        assert response.status_code == 200
+        outbox.shutdown()
+        assert mail.outbox and mail.outbox[0].to == ['threaded@yamdb.fake'], (
+            'Проверьте, что в режиме `thread` письмо отправляется в фоне'
+        )
+        assert OutgoingEmail.objects.get().status == OutgoingEmail.SENT
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_retry_with_worker(self, client, settings):
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_BACKEND = 'tests.test_14_email_queue.FailingBackend'
+        signup(client, 'retry')
+        email = OutgoingEmail.objects.get()
+        assert (email.status, email.attempts) == (OutgoingEmail.PENDING, 1), (
+            'Проверьте, что неотправленное письмо остаётся в очереди'
+        )
+        assert 'SMTP' in email.last_error
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+        call_command('send_emails', once=True)
+        assert not mail.outbox, (
+            'Проверьте, что повторная отправка ждёт задержку'
+        )
+        OutgoingEmail.objects.update(next_attempt_at=email.created)
+        call_command('send_emails', once=True)
+        email.refresh_from_db()
+        assert email.status == OutgoingEmail.SENT and len(mail.outbox) == 1, (
+            'Проверьте, что команда `send_emails` отправляет письма из очереди'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_worker_mode(self, client, settings):
+        settings.EMAIL_QUEUE_MODE = 'worker'
+        for number in range(3):
+            signup(client, f'worker{number}')
+        assert not mail.outbox, (
+            'Проверьте, что в режиме `worker` письма не отправляются в запросе'
+        )
+        call_command('send_emails', once=True, batch_size=2)
+        assert len(mail.outbox) == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_purge_sent(self, client, settings):
+        from datetime import timedelta
+
+        from django.utils import timezone
+        from users.models import OutgoingEmail
+
+        settings.EMAIL_QUEUE_MODE = 'worker'
+        for number in range(3):
+            signup(client, f'purge{number}')
+        call_command('send_emails', once=True)
+        old, recent, pending = OutgoingEmail.objects.all()
+        OutgoingEmail.objects.filter(pk=old.pk).update(
+            sent_at=timezone.now() - timedelta(
+                seconds=settings.EMAIL_QUEUE_KEEP_SENT + 1
+            )
+        )
+        OutgoingEmail.objects.filter(pk=pending.pk).update(
+            status=OutgoingEmail.PENDING,
+            next_attempt_at=timezone.now() + timedelta(hours=1)
+        )
+        call_command('send_emails', once=True)
+        assert set(OutgoingEmail.objects.values_list('pk', flat=True)) == {
+            recent.pk, pending.pk
+        }, (
+            'Проверьте, что `send_emails` удаляет старые отправленные письма'
+        )
+
+    def test_05_thread_errors_logged(self, settings, monkeypatch, caplog):
+        from users import outbox
+
+        def broken():
+            raise RuntimeError('БД недоступна')
+
+        settings.EMAIL_QUEUE_MODE = 'thread'
+        monkeypatch.setattr(outbox, 'deliver_in_thread', broken)
+        outbox.dispatch()
+        outbox.shutdown()
+        assert 'БД недоступна' in caplog.text, (
+            'Проверьте, что ошибки фоновой отправки попадают в лог'
+        )
+
+    def test_06_admin_hides_body(self):
+        from django.contrib import admin
+        from users.models import OutgoingEmail
+
+        model_admin = admin.site._registry[OutgoingEmail]
+        assert 'body' not in model_admin.get_fields(None), (
+            'Проверьте, что текст письма с кодом не виден в админке'
+        )
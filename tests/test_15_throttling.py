@@ -0,0 +1,59 @@
+import pytest
+from django.core import mail
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+URL_TOKEN = '/api/v1/auth/token/'
+
+
+class Test15Throttling:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_resend_coalesced(self, client):
+        data = {'username': 'resend', 'email': 'resend@yamdb.fake'}
+        for _ in range(3):
+            response = client.post(URL_SIGNUP, data=data)
+            assert response.status_code == 200, (
+                f'Проверьте, что повторный POST запрос `{URL_SIGNUP}` '
+                'зарегистрированного пользователя возвращает статус 200'
+            )
+        assert len(mail.outbox) == 1, (
+            f'Проверьте, что повторные POST запросы `{URL_SIGNUP}` '
+            'в пределах окна не отправляют новые письма'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_signup_identity_throttled(self, client):
+        data = {'username': 'bot', 'email': 'bot@yamdb.fake'}
+        statuses = [client.post(URL_SIGNUP, data=data).status_code
+                    for _ in range(6)]
+        assert statuses[:5] == [200] * 5 and statuses[5] == 429, (
+            f'Проверьте, что частые POST запросы `{URL_SIGNUP}` '
+            'с одним username ограничиваются статусом 429'
+        )
+        response = client.post(
+            URL_SIGNUP, data={'username': 'other', 'email': 'bot@yamdb.fake'}
+        )
+        assert response.status_code == 429, (
+            f'Проверьте, что POST запросы `{URL_SIGNUP}` ограничиваются '
+            'и по email'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_token_throttled(self, client):
+        data = {'username': 'nobody', 'confirmation_code': '123'}
+        statuses = [client.post(URL_TOKEN, data=data).status_code
+                    for _ in range(11)]
+        assert statuses[-1] == 429 and 429 not in statuses[:10], (
+            f'Проверьте, что частые POST запросы `{URL_TOKEN}` '
+            'с одним username ограничиваются статусом 429'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_list_body_rejected(self, client):
+        for url in (URL_SIGNUP, URL_TOKEN):
+            response = client.post(url, data=[1, 2],
+                                   content_type='application/json')
+            assert response.status_code == 400, (
+                f'Проверьте, что POST запрос `{url}` со списком в теле '
+                'возвращает статус 400'
+            )
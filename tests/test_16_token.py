@@ -0,0 +1,35 @@
+import re
+
+import pytest
+from django.core import mail
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+URL_TOKEN = '/api/v1/auth/token/'
+
+
+class Test16Token:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_token_queries(self, client):
+        client.post(URL_SIGNUP, data={'username': 'login',
+                                      'email': 'login@yamdb.fake'})
+        code = re.search(r'Token:(\S+)', mail.outbox[0].body).group(1)
+        data = {'username': 'login', 'confirmation_code': code}
+        issued = []
+        for expected in (2, 1):
+            with CaptureQueriesContext(connection) as context:
+                response = client.post(URL_TOKEN, data=data)
+            assert response.status_code == 200 and response.json()['token']
+            queries = [query['sql'] for query in context.captured_queries]
+            assert len(queries) == expected, (
+                f'Проверьте, что POST запрос `{URL_TOKEN}` выполняет '
+                f'{expected} запрос(а) к БД, сейчас: {queries}'
+            )
+            issued.append(queries)
+        update = issued[0][1]
+        assert update.startswith('UPDATE') and 'last_login' not in update, (
+            f'Проверьте, что POST запрос `{URL_TOKEN}` не перезаписывает '
+            'все поля пользователя'
+        )
@@ -0,0 +1,61 @@
+import pytest
+
+from .common import get_with_queries
+
+
+class Test17AuthCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_user_cached(self, user_client, admin_client):
+        url = '/api/v1/users/me/'
+        response, queries = get_with_queries(user_client, url)
+        assert response.status_code == 200 and queries == 1
+        response, queries = get_with_queries(user_client, url)
+        assert response.status_code == 200 and queries == 0, (
+            f'Проверьте, что повторный GET запрос `{url}` не загружает '
+            'пользователя из БД'
+        )
+        admin_client.patch('/api/v1/users/TestUser/',
+                           data={'role': 'moderator'})
+        response = user_client.get(url)
+        assert response.json()['role'] == 'moderator', (
+            'Проверьте, что изменение роли пользователя сбрасывает кэш '
+            'аутентификации'
+        )
+        user_client.patch(url, data={'bio': 'Новое о себе'})
+        assert user_client.get(url).json()['bio'] == 'Новое о себе', (
+            f'Проверьте, что PATCH запрос `{url}` сбрасывает кэш '
+            'аутентификации'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_inactive_user_rejected(self, user, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что деактивированный пользователь не проходит '
+            'аутентификацию из кэша'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_password_not_cached(self, user, user_client):
+        from django.core.cache import cache
+        from users.cache import user_cache_key
+
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        cached = cache.get(user_cache_key(user.pk))
+        assert cached is not None and user.password not in cached, (
+            'Проверьте, что хэш пароля не хранится в кэше аутентификации'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bulk_update_resets_cache(self, user, user_client):
+        from users.models import CustomUser
+
+        assert user_client.get('/api/v1/users/me/').status_code == 200
+        CustomUser.objects.filter(pk=user.pk).update(is_active=False)
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что update() в обход сигналов сбрасывает кэш '
+            'аутентификации'
+        )
@@ -0,0 +1,32 @@
+import pytest
+
+from .common import create_comments, explain
+
+
+class Test18Indexes:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_nested_listings_use_indexes(self, admin_client, admin):
+        from reviews.models import Comment, Review
+
+        create_comments(admin_client, admin)
+        review = Review.objects.first()
+        querysets = (
+            (Review.objects.filter(title_id=review.title_id),
+             'review_title_pub_date_idx'),
+            (Review.objects.filter(title_id=review.title_id).order_by(
+                '-pub_date', '-id'), 'review_title_pub_date_idx'),
+            (Comment.objects.filter(review_id=review.pk),
+             'comment_review_pub_date_idx'),
+            (Comment.objects.filter(review_id=review.pk).order_by(
+                '-pub_date', '-id'), 'comment_review_pub_date_idx'),
+        )
+        for queryset, index in querysets:
+            plan = explain(queryset)
+            assert index in plan, (
+                f'Проверьте, что запрос использует индекс `{index}`: {plan}'
+            )
+            assert 'TEMP B-TREE' not in plan and 'Sort' not in plan, (
+                f'Проверьте, что сортировку запроса обеспечивает индекс '
+                f'`{index}`: {plan}'
+            )
@@ -0,0 +1,130 @@
+import pytest
+
+from .common import create_titles
+
+
+def found_ids(client, term):
+    response = client.get('/api/v1/titles/', {'search': term})
+    assert response.status_code == 200, (
+        'Проверьте, что при GET запросе `/api/v1/titles/?search=` '
+        'возвращается статус 200'
+    )
+    return [title['id'] for title in response.json()['results']]
+
+
+class Test19Search:
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('backend', ['auto', 'trigram'])
+    def test_01_search_titles(self, client, admin_client, settings,
+                              backend):
+        settings.TITLE_SEARCH_BACKEND = backend
+        titles, categories, genres = create_titles(admin_client)
+        assert found_ids(client, 'драма') == [titles[1]['id']], (
+            'Проверьте, что `?search=` ищет по описанию произведения'
+        )
+        assert found_ids(client, 'поворот') == [titles[0]['id']], (
+            'Проверьте, что `?search=` ищет по названию без учёта регистра'
+        )
+        assert found_ids(client, 'несуществующее') == [], (
+            'Проверьте, что `?search=` без совпадений возвращает пустой список'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/',
+            data={'name': 'Поворот обратно'}
+        )
+        assert set(found_ids(client, 'поворот')) == {
+            titles[0]['id'], titles[1]['id']
+        }, 'Проверьте, что поисковый индекс обновляется при изменении'
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert found_ids(client, 'поворот') == [titles[1]['id']], (
+            'Проверьте, что удалённое произведение пропадает из поиска'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize('backend', ['auto', 'trigram'])
+    def test_02_search_ranking(self, client, admin_client, settings,
+                               backend):
+        settings.TITLE_SEARCH_BACKEND = backend
+        titles, categories, genres = create_titles(admin_client)
+        data = {'name': 'Главная драма', 'year': 2021,
+                'genre': [genres[0]['slug']],
+                'category': categories[0]['slug'],
+                'description': 'Драма о драме'}
+        best = admin_client.post('/api/v1/titles/', data=data).json()['id']
+        assert found_ids(client, 'драма') == [best, titles[1]['id']], (
+            'Проверьте, что результаты `?search=` упорядочены '
+            'по релевантности'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_prefix_and_typos(self, client, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        assert found_ids(client, 'пов') == [titles[0]['id']], (
+            'Проверьте, что `?search=` находит произведения по началу слова'
+        )
+        settings.TITLE_SEARCH_BACKEND = 'trigram'
+        assert found_ids(client, 'поворт') == [titles[0]['id']], (
+            'Проверьте, что триграммный поиск прощает опечатки'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_reviews_keep_trigram_index(self, client, admin_client,
+                                           settings):
+        from reviews.search import trigram_index
+
+        settings.TITLE_SEARCH_BACKEND = 'trigram'
+        titles, _, _ = create_titles(admin_client)
+        assert found_ids(client, 'поворот') == [titles[0]['id']]
+        postings = trigram_index.postings
+        response = admin_client.post(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            data={'text': 'Поворот так поворот', 'score': 9}
+        )
+        assert response.status_code == 201
+        assert found_ids(client, 'поворот') == [titles[0]['id']]
+        assert trigram_index.postings is postings, (
+            'Проверьте, что новый отзыв не перестраивает '
+            'поисковый индекс произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_fts_check_is_cached(self, client, admin_client,
+                                    monkeypatch):
+        from django.db import connection
+
+        titles, _, _ = create_titles(admin_client)
+        found_ids(client, 'поворот')
+        calls = []
+        table_names = connection.introspection.table_names
+        monkeypatch.setattr(
+            connection.introspection, 'table_names',
+            lambda *args: calls.append(args) or table_names(*args)
+        )
+        # Другой запрос: ответ на прежний уже в кэше.
+        assert found_ids(client, 'драма') == [titles[1]['id']]
+        assert not calls, (
+            'Проверьте, что наличие таблицы FTS5 не проверяется '
+            'на каждом запросе'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_trigram_index_max_age(self, client, admin_client, settings,
+                                      monkeypatch):
+        import time
+
+        from reviews.models import Title
+
+        settings.TITLE_SEARCH_BACKEND = 'trigram'
+        settings.INDEX_MAX_AGE = 60
+        titles, _, _ = create_titles(admin_client)
+        assert found_ids(client, 'поворот') == [titles[0]['id']]
+        # Переименование в другом воркере: версия в этом кэше та же.
+        Title.objects.filter(pk=titles[0]['id']).update(name='Обратно')
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 61)
+        assert found_ids(client, 'обратно') == [titles[0]['id']], (
+            'Проверьте, что поисковый индекс перестраивается по возрасту'
+        )
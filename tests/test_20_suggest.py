@@ -0,0 +1,92 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_titles
+
+
+def suggest(client, **params):
+    response = client.get('/api/v1/suggest/', params)
+    assert response.status_code == 200, (
+        'Проверьте, что GET запрос `/api/v1/suggest/` '
+        'доступен без токена и возвращает статус 200'
+    )
+    return response.json()
+
+
+class Test20Suggest:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_prefix_matches(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        assert suggest(client, q='Пов') == [
+            {'type': 'title', 'id': titles[0]['id'], 'name': 'Поворот туда'}
+        ], 'Проверьте, что подсказки ищут по началу названия'
+        assert suggest(client, q='туд') == suggest(client, q='Пов'), (
+            'Проверьте, что подсказки ищут по началу любого слова названия'
+        )
+        assert {item['name'] for item in suggest(client, q='к')} == {
+            'Комедия', 'Книги'
+        }, 'Проверьте, что подсказки ищут по названиям жанров и категорий'
+        assert suggest(client, q='фил', type='category') == [
+            {'type': 'category', 'slug': categories[0]['slug'],
+             'name': categories[0]['name']}
+        ], 'Проверьте фильтр подсказок `?type=`'
+        assert len(suggest(client, q='к', limit=1)) == 1, (
+            'Проверьте, что `?limit=` ограничивает число подсказок'
+        )
+        assert suggest(client, q='') == []
+        response = client.get('/api/v1/suggest/', {'q': 'к', 'type': 'user'})
+        assert response.status_code == 400, (
+            'Проверьте, что неизвестный `?type=` возвращает статус 400'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_no_queries_and_fresh(self, client, admin_client):
+        from reviews.cache import bulk_data_changed
+        from reviews.models import Genre
+
+        titles, categories, genres = create_titles(admin_client)
+        suggest(client, q='пов')
+        with CaptureQueriesContext(connection) as context:
+            suggest(client, q='про')
+        assert len(context) == 0, (
+            'Проверьте, что подсказки отдаются без запросов к БД'
+        )
+
+        admin_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/', data={'name': 'Обратно'}
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert suggest(client, q='пов') == []
+            assert suggest(client, q='обр')[0]['id'] == titles[0]['id']
+        assert len(context) == 0, (
+            'Проверьте, что изменения в процессе не перестраивают индекс'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert suggest(client, q='обр') == [], (
+            'Проверьте, что удалённые объекты пропадают из подсказок'
+        )
+
+        Genre.objects.bulk_create([Genre(name='Пародия', slug='parody')])
+        bulk_data_changed()
+        assert suggest(client, q='пар') == [
+            {'type': 'genre', 'slug': 'parody', 'name': 'Пародия'}
+        ], 'Проверьте, что индекс перестраивается после массовой загрузки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_index_max_age(self, client, settings, monkeypatch):
+        import time
+
+        from reviews.models import Genre
+
+        settings.INDEX_MAX_AGE = 60
+        assert suggest(client, q='пар') == []
+        # Жанр добавил другой воркер: версия в этом кэше не сменилась.
+        Genre.objects.bulk_create([Genre(name='Пародия', slug='parody')])
+        assert suggest(client, q='пар') == []
+        now = time.monotonic()
+        monkeypatch.setattr(time, 'monotonic', lambda: now + 61)
+        assert suggest(client, q='пар') == [
+            {'type': 'genre', 'slug': 'parody', 'name': 'Пародия'}
+        ], 'Проверьте, что индекс подсказок перестраивается по возрасту'
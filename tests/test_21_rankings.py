@@ -0,0 +1,184 @@
+import datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .common import create_reviews, explain
+
+
+def ids(client, url):
+    response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET запрос `{url}` возвращает статус 200'
+    )
+    return [title['id'] for title in response.json()['results']]
+
+
+class Test21Rankings:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_ordering_by_rating(self, client, admin_client, admin):
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        top, unrated = titles[0]['id'], titles[1]['id']
+        admin_client.post(
+            f'/api/v1/titles/{unrated}/reviews/', data={'text': 'А', 'score': 9}
+        )
+        assert ids(client, '/api/v1/titles/?ordering=-rating') == [
+            unrated, top
+        ], 'Проверьте сортировку `?ordering=-rating`'
+
+        data = {'name': 'Новинка', 'year': 2000, 'genre': ['horror'],
+                'category': 'films'}
+        new = admin_client.post('/api/v1/titles/', data=data).json()['id']
+        assert ids(client, '/api/v1/titles/?ordering=rating') == [
+            new, top, unrated
+        ], (
+            'Проверьте сортировку `?ordering=rating`: произведения '
+            'без оценок считаются наименьшими'
+        )
+
+        review = client.get(f'/api/v1/titles/{unrated}/reviews/').json()
+        admin_client.delete(
+            f'/api/v1/titles/{unrated}/reviews/'
+            f'{review["results"][0]["id"]}/'
+        )
+        assert ids(client, '/api/v1/titles/?ordering=-rating') == [
+            top, new, unrated
+        ], 'Проверьте, что удаление отзыва меняет сортировку по рейтингу'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_trending(self, client, admin_client, admin):
+        from reviews.models import Review
+
+        _, titles, user, _ = create_reviews(admin_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+        admin_client.post(
+            f'/api/v1/titles/{second}/reviews/', data={'text': 'А', 'score': 9}
+        )
+        assert ids(client, '/api/v1/titles/trending/') == [first, second], (
+            'Проверьте, что `/api/v1/titles/trending/` упорядочен по числу '
+            'свежих отзывов'
+        )
+
+        Review.objects.filter(title_id=first).update(
+            pub_date=timezone.now() - datetime.timedelta(days=30)
+        )
+        call_command('rank_titles')
+        assert ids(client, '/api/v1/titles/trending/') == [second], (
+            'Проверьте, что команда rank_titles убирает старые отзывы '
+            'из популярности'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_rankings_use_indexes(self, admin_client, admin):
+        from reviews.models import Title
+
+        create_reviews(admin_client, admin)
+        querysets = (
+            (Title.objects.filter(ranking__isnull=False).order_by(
+                '-ranking__rating', '-ranking__title'), 'ranking_rating_idx'),
+            (Title.objects.filter(ranking__isnull=False).order_by(
+                'ranking__rating', 'ranking__title'), 'ranking_rating_idx'),
+            (Title.objects.filter(ranking__trending__gt=0).order_by(
+                '-ranking__trending', '-ranking__title'),
+             'ranking_trending_idx'),
+        )
+        for queryset, index in querysets:
+            plan = explain(queryset)
+            assert index in plan, (
+                f'Проверьте, что запрос использует индекс `{index}`: {plan}'
+            )
+            assert 'TEMP B-TREE' not in plan and 'Sort' not in plan, (
+                f'Проверьте, что сортировку обеспечивает индекс '
+                f'`{index}`: {plan}'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_rebuild_stops_after_short_batch(self, admin_client, admin):
+        from reviews.models import TitleRanking
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        with CaptureQueriesContext(connection) as context:
+            assert TitleRanking.objects.rebuild([titles[0]['id']]) == 1
+        batches = [
+            query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_title" ' in query['sql']
+        ]
+        assert len(batches) == 1, (
+            'Проверьте, что пересчёт рейтинга не запрашивает '
+            f'пустую пачку после неполной: {batches}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_unranked_titles_kept(self, client, admin_client, admin):
+        from reviews.models import TitleRanking
+
+        _, titles, _, _ = create_reviews(admin_client, admin)
+        top, unrated = titles[0]['id'], titles[1]['id']
+        TitleRanking.objects.filter(title_id=top).delete()
+        for ordering in ('rating', '-rating'):
+            assert ids(client, f'/api/v1/titles/?ordering={ordering}') == [
+                unrated, top
+            ], (
+                f'Проверьте, что `?ordering={ordering}` не теряет '
+                'произведения без строки рейтинга и ставит их в конец'
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_one_rebuild_per_transaction(self, admin_client, admin,
+                                            monkeypatch):
+        from django.db import transaction
+        from reviews.models import Review, TitleRankingQuerySet
+
+        _, titles, user, moderator = create_reviews(admin_client, admin)
+        calls = []
+        rebuild = TitleRankingQuerySet.rebuild
+        monkeypatch.setattr(
+            TitleRankingQuerySet, 'rebuild',
+            lambda self, title_ids=None, **kwargs: calls.append(
+                set(title_ids)
+            ) or rebuild(self, title_ids, **kwargs)
+        )
+        with transaction.atomic():
+            for title in titles:
+                for author in (user, moderator):
+                    Review.objects.update_or_create(
+                        title_id=title['id'], author=author,
+                        defaults={'text': 'Пачкой', 'score': 10}
+                    )
+        assert calls == [{title['id'] for title in titles}], (
+            'Проверьте, что рейтинги пересчитываются один раз '
+            f'на транзакцию: {calls}'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_07_rebuild_after_rollback(self, admin_client, admin,
+                                       monkeypatch):
+        from django.db import transaction
+        from reviews.models import Review, TitleRankingQuerySet
+
+        _, titles, user, _ = create_reviews(admin_client, admin)
+        first, second = titles[0]['id'], titles[1]['id']
+        calls = []
+        rebuild = TitleRankingQuerySet.rebuild
+        monkeypatch.setattr(
+            TitleRankingQuerySet, 'rebuild',
+            lambda self, title_ids=None, **kwargs: calls.append(
+                set(title_ids)
+            ) or rebuild(self, title_ids, **kwargs)
+        )
+        with pytest.raises(RuntimeError):
+            with transaction.atomic():
+                Review.objects.filter(title_id=first).first().save()
+                raise RuntimeError
+        assert calls == []
+        with transaction.atomic():
+            Review.objects.create(title_id=second, author=user,
+                                  text='После отката', score=9)
+        assert calls == [{second}], (
+            'Проверьте, что откат транзакции не мешает пересчёту '
+            f'рейтинга в следующей: {calls}'
+        )
@@ -0,0 +1,181 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .common import create_titles
+
+
+def bulk_genres(count, start=0):
+    return [
+        {'name': f'Жанр {number}', 'slug': f'genre-{number}'}
+        for number in range(start, start + count)
+    ]
+
+
+class Test22Bulk:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_bulk_create_titles(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        data = [
+            {'name': f'Пачка {number}', 'year': 2000 + number,
+             'genre': [genres[0]['slug'], genres[number % 3]['slug']],
+             'category': categories[number % 2]['slug']}
+            for number in range(3)
+        ]
+        response = admin_client.post(
+            '/api/v1/titles/bulk/', data=data, format='json'
+        )
+        assert response.status_code == 201, (
+            'Проверьте, что POST запрос `/api/v1/titles/bulk/` со списком '
+            'произведений возвращает статус 201'
+        )
+        created = response.json()
+        assert [title['name'] for title in created] == [
+            'Пачка 0', 'Пачка 1', 'Пачка 2'
+        ]
+        title = client.get(f'/api/v1/titles/{created[1]["id"]}/').json()
+        assert {genre['slug'] for genre in title['genre']} == {
+            genres[0]['slug'], genres[1]['slug']
+        }, 'Проверьте, что bulk-создание сохраняет жанры произведений'
+        assert client.get('/api/v1/titles/').json()['count'] == 5, (
+            'Проверьте, что bulk-создание сбрасывает кэш списка произведений'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_bulk_errors_per_item(self, client, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        data = [
+            {'name': 'Хорошее', 'year': 2000, 'genre': [genres[0]['slug']],
+             'category': categories[0]['slug']},
+            {'name': 'Без жанра', 'year': 2000, 'genre': ['unknown'],
+             'category': 'nope'},
+            {'name': 'Из будущего', 'year': 3000,
+             'genre': [genres[0]['slug']],
+             'category': categories[0]['slug']},
+        ]
+        response = admin_client.post(
+            '/api/v1/titles/bulk/', data=data, format='json'
+        )
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == 3 and errors[0] == {}, (
+            'Проверьте, что ошибки bulk-запроса выводятся списком '
+            'по каждому элементу'
+        )
+        assert set(errors[1]) == {'genre', 'category'}
+        assert set(errors[2]) == {'year'}
+        assert client.get('/api/v1/titles/').json()['count'] == 2, (
+            'Проверьте, что при ошибках bulk-запрос ничего не записывает'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_update_and_delete_titles(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        data = [
+            {'id': titles[0]['id'], 'name': 'Новое имя'},
+            {'id': titles[1]['id'], 'genre': [genres[0]['slug']],
+             'category': categories[0]['slug']},
+        ]
+        response = admin_client.patch(
+            '/api/v1/titles/bulk/', data=data, format='json'
+        )
+        assert response.status_code == 200, (
+            'Проверьте, что PATCH запрос `/api/v1/titles/bulk/` '
+            'возвращает статус 200'
+        )
+        first = client.get(f'/api/v1/titles/{titles[0]["id"]}/').json()
+        second = client.get(f'/api/v1/titles/{titles[1]["id"]}/').json()
+        assert first['name'] == 'Новое имя'
+        assert len(first['genre']) == 2
+        assert [genre['slug'] for genre in second['genre']] == [
+            genres[0]['slug']
+        ], 'Проверьте, что bulk-изменение заменяет жанры произведения'
+        assert second['category']['slug'] == categories[0]['slug']
+
+        response = admin_client.patch(
+            '/api/v1/titles/bulk/', data=[{'id': 100500, 'name': 'А'}],
+            format='json'
+        )
+        assert response.status_code == 400, (
+            'Проверьте, что bulk-изменение несуществующего объекта '
+            'возвращает статус 400'
+        )
+
+        response = admin_client.delete(
+            '/api/v1/titles/bulk/', data=[titles[0]['id'], 100500],
+            format='json'
+        )
+        assert response.status_code == 400
+        assert response.json()[0] == {}
+        response = admin_client.delete(
+            '/api/v1/titles/bulk/', data=[titles[0]['id'], titles[1]['id']],
+            format='json'
+        )
+        assert response.status_code == 204, (
+            'Проверьте, что DELETE запрос `/api/v1/titles/bulk/` со списком '
+            'id возвращает статус 204'
+        )
+        assert client.get('/api/v1/titles/').json()['count'] == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bulk_genres_and_categories(self, client, admin_client):
+        def post_genres(data):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(
+                    '/api/v1/genres/bulk/', data=data, format='json'
+                )
+            assert response.status_code == 201, response.json()
+            return len(context)
+
+        # Первый запрос кладёт администратора в кэш аутентификации.
+        admin_client.get('/api/v1/genres/')
+        few = post_genres(bulk_genres(2))
+        many = post_genres(bulk_genres(20, start=2))
+        assert few == many, (
+            'Проверьте, что число запросов к БД при bulk-создании жанров '
+            'не зависит от их числа'
+        )
+        assert client.get('/api/v1/genres/').json()['count'] == 22
+
+        data = bulk_genres(1) + [
+            {'name': 'Дубль', 'slug': 'twice'},
+            {'name': 'Дубль', 'slug': 'twice'},
+        ]
+        response = admin_client.post(
+            '/api/v1/genres/bulk/', data=data, format='json'
+        )
+        assert response.status_code == 400
+        assert [set(errors) for errors in response.json()] == [
+            {'slug'}, {'slug'}, {'slug'}
+        ], 'Проверьте проверку уникальности слагов в bulk-запросе'
+
+        response = admin_client.post(
+            '/api/v1/categories/bulk/',
+            data=[{'name': 'Музыка', 'slug': 'music'}], format='json'
+        )
+        assert response.status_code == 201
+        response = admin_client.patch(
+            '/api/v1/categories/bulk/', data=[], format='json'
+        )
+        assert response.status_code == 405, (
+            'Проверьте, что категории не поддерживают bulk PATCH'
+        )
+        response = admin_client.delete(
+            '/api/v1/genres/bulk/', data=['genre-0', 'genre-1'],
+            format='json'
+        )
+        assert response.status_code == 204
+        assert client.get('/api/v1/genres/').json()['count'] == 20
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_bulk_permissions(self, user_client):
+        for api_client in (APIClient(), user_client):
+            response = api_client.post(
+                '/api/v1/genres/bulk/', data=bulk_genres(1), format='json'
+            )
+            assert response.status_code in (401, 403), (
+                'Проверьте, что bulk-эндпоинты доступны только '
+                'администратору'
+            )
@@ -0,0 +1,79 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .common import create_categories
+
+
+def create_genres(admin_client, count):
+    data = [
+        {'name': f'Жанр {number}', 'slug': f'genre-{number}'}
+        for number in range(count)
+    ]
+    admin_client.post('/api/v1/genres/bulk/', data=data, format='json')
+    return [genre['slug'] for genre in data]
+
+
+def post_title(admin_client, genres, category):
+    data = {'name': 'Произведение', 'year': 2000, 'genre': genres,
+            'category': category}
+    with CaptureQueriesContext(connection) as context:
+        response = admin_client.post(
+            '/api/v1/titles/', data=data, format='json'
+        )
+    assert response.status_code == 201, response.json()
+    return response.json(), len(context)
+
+
+class Test23TitleGenres:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_genres_resolved_in_one_query(self, admin_client):
+        categories = create_categories(admin_client)
+        genres = create_genres(admin_client, 15)
+        _, one = post_title(admin_client, genres[:1], categories[0]['slug'])
+        title, many = post_title(admin_client, genres, categories[0]['slug'])
+        assert one == many, (
+            'Проверьте, что число запросов к БД при создании произведения '
+            'не зависит от числа жанров'
+        )
+        assert sorted(title['genre']) == sorted(genres)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_unknown_genres_reported_together(self, admin_client):
+        categories = create_categories(admin_client)
+        genres = create_genres(admin_client, 2)
+        data = {'name': 'Произведение', 'year': 2000,
+                'genre': [genres[0], 'first', 'second'],
+                'category': categories[0]['slug']}
+        response = admin_client.post(
+            '/api/v1/titles/', data=data, format='json'
+        )
+        assert response.status_code == 400
+        message = str(response.json()['genre'])
+        assert 'first' in message and 'second' in message, (
+            'Проверьте, что все неизвестные слаги жанров выводятся сразу'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_update_diffs_genre_links(self, admin_client):
+        from reviews.models import GenreTitle
+
+        categories = create_categories(admin_client)
+        genres = create_genres(admin_client, 4)
+        title, _ = post_title(admin_client, genres[:3], categories[0]['slug'])
+        kept = set(GenreTitle.objects.filter(
+            title_id=title['id'], genre__slug__in=genres[1:3]
+        ).values_list('pk', flat=True))
+        response = admin_client.patch(
+            f'/api/v1/titles/{title["id"]}/',
+            data={'genre': genres[1:]}, format='json'
+        )
+        assert response.status_code == 200
+        assert sorted(response.json()['genre']) == genres[1:]
+        links = GenreTitle.objects.filter(title_id=title['id'])
+        assert kept <= set(links.values_list('pk', flat=True)), (
+            'Проверьте, что при изменении жанров сохраняются '
+            'неизменившиеся связи'
+        )
+        assert links.count() == 3
@@ -0,0 +1,75 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APIClient
+
+from .common import create_titles
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.PROFILING_ENABLED = True
+    settings.PROFILING_LOG = str(tmp_path / 'profiling.jsonl')
+    return settings.PROFILING_LOG
+
+
+class Test24Profiling:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_server_timing(self, profiling, admin_client):
+        create_titles(admin_client)
+        response = APIClient().get('/api/v1/titles/')
+        timing = response.get('Server-Timing', '')
+        for metric in ('db;dur=', 'view;dur=', 'serializer;dur=',
+                       'render;dur=', 'total;dur='):
+            assert metric in timing, (
+                f'Проверьте, что заголовок Server-Timing содержит '
+                f'`{metric}`: {timing}'
+            )
+        assert 'queries' in timing
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_duplicate_queries(self, settings):
+        from api.profiling import RequestProfile
+
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            for pk in range(3):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT id FROM reviews_title WHERE id = %s', [pk]
+                    )
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT COUNT(*) FROM reviews_genre')
+        assert profile.duplicates() == [
+            ('SELECT id FROM reviews_title WHERE id = %s', 3)
+        ], 'Проверьте, что повторяющиеся запросы определяются по тексту SQL'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_report(self, profiling, admin_client, capsys):
+        titles, _, _ = create_titles(admin_client)
+        client = APIClient()
+        for _ in range(3):
+            client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        capsys.readouterr()
+        call_command('profile_report', '--reset')
+        output = capsys.readouterr().out
+        assert 'GET title-list' in output and 'GET title-detail' in output, (
+            'Проверьте, что profile_report группирует замеры по имени URL'
+        )
+        assert 'POST title-list' in output
+        assert 'BEGIN' not in output, (
+            'Проверьте, что команды транзакций не считаются повторами'
+        )
+        with open(profiling) as file:
+            assert file.read() == '', (
+                'Проверьте, что profile_report --reset очищает файл замеров'
+            )
+
+    def test_04_disabled_by_default(self, client):
+        from api.profiling import ProfilingMiddleware
+        from django.core.exceptions import MiddlewareNotUsed
+
+        with pytest.raises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: None)
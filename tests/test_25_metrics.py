@@ -0,0 +1,111 @@
+import os
+import re
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def sample(text, name, **labels):
+    """Значение строки метрики с заданными метками, 0 если её нет."""
+    for line in text.splitlines():
+        match = re.match(r'(\w+)\{(.*)\} (\S+)$', line)
+        if not match or match.group(1) != name:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(2)))
+        if all(found.get(key) == str(value) for key, value in labels.items()):
+            return float(match.group(3))
+    return 0.0
+
+
+@pytest.fixture(autouse=True)
+def metrics_enabled(settings):
+    settings.METRICS_ENABLED = True
+
+
+def scrape(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200, (
+        'Проверьте, что GET запрос `/metrics` возвращает статус 200'
+    )
+    assert response['Content-Type'].startswith('text/plain')
+    return response.content.decode()
+
+
+class Test25Metrics:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_request_metrics(self, client):
+        labels = {'view': 'TitleViewSet', 'action': 'list'}
+        before = scrape(client)
+        api_client = APIClient()
+        for _ in range(3):
+            api_client.get('/api/v1/titles/')
+        after = scrape(client)
+        for name, extra in (('api_requests_total', {'status': 200}),
+                            ('api_request_duration_seconds_count', {}),
+                            ('api_request_db_queries_count', {})):
+            delta = (sample(after, name, **labels, **extra)
+                     - sample(before, name, **labels, **extra))
+            assert delta == 3, (
+                f'Проверьте, что `/metrics` считает `{name}` по '
+                f'представлению и действию'
+            )
+        assert sample(after, 'api_request_duration_seconds_bucket',
+                      le='+Inf', **labels) >= 3
+        assert '# TYPE api_request_duration_seconds histogram' in after
+
+    def test_02_multiprocess_aggregation(self, settings, tmp_path):
+        from api.metrics import REQUESTS, registry
+
+        settings.METRICS_DIR = str(tmp_path)
+        registry.reset()
+        ready, release = os.pipe(), os.pipe()
+        try:
+            labels = ('WorkerViewSet', 'list', 200)
+            REQUESTS.inc(labels)
+            pid = os.fork()
+            if pid == 0:
+                REQUESTS.inc(labels, 2)
+                os.write(ready[1], b'1')
+                # Воркер жив, пока родитель не соберёт метрики.
+                os.read(release[0], 1)
+                os._exit(0)
+            os.read(ready[0], 1)
+            assert len(os.listdir(tmp_path)) == 2, (
+                'Проверьте, что каждый процесс пишет метрики в свой файл'
+            )
+            text = registry.exposition()
+            assert sample(text, 'api_requests_total',
+                          view='WorkerViewSet', action='list',
+                          status=200) == 3, (
+                'Проверьте, что `/metrics` суммирует значения всех процессов'
+            )
+            os.write(release[1], b'1')
+            os.waitpid(pid, 0)
+            text = registry.exposition()
+            assert os.listdir(tmp_path) == [
+                f'metrics_{os.getpid()}.db'
+            ], 'Проверьте, что файлы завершившихся процессов удаляются'
+            assert sample(text, 'api_requests_total',
+                          view='WorkerViewSet', action='list',
+                          status=200) == 1
+        finally:
+            for fd in (*ready, *release):
+                os.close(fd)
+            settings.METRICS_DIR = ''
+            registry.reset()
+
+    def test_03_token(self, client, settings):
+        settings.METRICS_TOKEN = 'secret'
+        assert client.get('/metrics').status_code == 403, (
+            'Проверьте, что при заданном METRICS_TOKEN `/metrics` '
+            'недоступен без токена'
+        )
+        response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        assert response.status_code == 200
+
+    def test_04_disabled(self, client, settings):
+        settings.METRICS_ENABLED = False
+        assert client.get('/metrics').status_code == 404, (
+            'Проверьте, что при выключенных метриках `/metrics` недоступен'
+        )
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+from django.core.management import call_command
+
+from benchmarks.datagen import FILES, generate
+
+SIZES = {'titles': 50, 'reviews': 300, 'comments': 200, 'users': 20}
+
+
+def read_files(directory):
+    contents = {}
+    for file in FILES:
+        with open(os.path.join(directory, file), 'rb') as f:
+            contents[file] = f.read()
+    return contents
+
+
+class Test26Datagen:
+
+    def test_01_deterministic(self, tmp_path):
+        first = generate(tmp_path / 'first', seed=7, **SIZES)
+        generate(tmp_path / 'second', seed=7, **SIZES)
+        generate(tmp_path / 'other', seed=8, **SIZES)
+        assert first['titles.csv'] == SIZES['titles']
+        assert first['review.csv'] == SIZES['reviews']
+        assert first['comments.csv'] == SIZES['comments']
+        assert read_files(tmp_path / 'first') == read_files(
+            tmp_path / 'second'
+        ), 'Проверьте, что одинаковый seed даёт одинаковые файлы'
+        assert read_files(tmp_path / 'first') != read_files(
+            tmp_path / 'other'
+        ), 'Проверьте, что другой seed даёт другие данные'
+
+    def test_02_too_many_reviews_per_title(self, tmp_path):
+        with pytest.raises(ValueError):
+            generate(tmp_path, titles=1, reviews=3, users=2, comments=0)
+
+    @pytest.mark.django_db(transaction=True, reset_sequences=True)
+    def test_03_import_generated(self, tmp_path):
+        from django.contrib.auth import get_user_model
+        from reviews.models import Comment, Review, Title
+
+        generate(tmp_path, **SIZES)
+        call_command('import_data', all=True, dir=str(tmp_path), workers=1)
+        counts = {
+            get_user_model(): SIZES['users'],
+            Title: SIZES['titles'],
+            Review: SIZES['reviews'],
+            Comment: SIZES['comments'],
+        }
+        for model, expected in counts.items():
+            assert model.objects.count() == expected, (
+                f'Проверьте, что сгенерированные данные `{model.__name__}` '
+                f'загружаются через `import_data --all`'
+            )
+        assert Title.objects.filter(rating_count__gt=0).count() == (
+            SIZES['titles']
+        )
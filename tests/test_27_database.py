@@ -0,0 +1,156 @@
+import threading
+
+import pytest
+from django.db import connections
+
+from api_yamdb.database import (ENGINES, check_connections,
+                                database_from_env)
+
+
+def file_connection(path):
+    """Отдельное подключение к файлу SQLite с настройками проекта."""
+    default = connections['default']
+    settings_dict = dict(default.settings_dict, NAME=str(path))
+    return default.__class__(settings_dict, alias='file')
+
+
+@pytest.fixture
+def file_db(django_db_blocker):
+    """Подключения к файлам SQLite в обход тестовой базы."""
+    with django_db_blocker.unblock():
+        yield
+
+
+def pragma(wrapper, name):
+    with wrapper.cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class Test27Database:
+
+    def test_01_sqlite_from_env(self):
+        database = database_from_env('/srv', env={
+            'SQLITE_BUSY_TIMEOUT': '1000', 'DB_CONN_MAX_AGE': '30'
+        })
+        assert database['ENGINE'] == ENGINES['sqlite']
+        assert database['NAME'] == '/srv/db.sqlite3'
+        assert database['CONN_MAX_AGE'] == 30
+        assert database['PRAGMAS']['journal_mode'] == 'WAL'
+        assert database['PRAGMAS']['synchronous'] == 'NORMAL'
+        assert database['PRAGMAS']['busy_timeout'] == 1000
+
+    def test_02_postgresql_from_env(self):
+        database = database_from_env('/srv', env={
+            'DB_ENGINE': 'postgresql', 'DB_NAME': 'yamdb',
+            'POSTGRES_USER': 'yamdb', 'POSTGRES_PASSWORD': 'secret',
+            'DB_HOST': 'db', 'DB_PORT': '6432',
+        })
+        assert database['ENGINE'] == 'django.db.backends.postgresql'
+        assert (database['NAME'], database['USER'], database['PASSWORD'],
+                database['HOST'], database['PORT']) == (
+            'yamdb', 'yamdb', 'secret', 'db', '6432'
+        )
+        assert database['CONN_MAX_AGE'] == 60, (
+            'Проверьте, что подключения по умолчанию постоянные'
+        )
+        assert 'PRAGMAS' not in database
+
+    @pytest.mark.usefixtures('file_db')
+    def test_03_sqlite_pragmas(self, tmp_path):
+        wrapper = file_connection(tmp_path / 'pragmas.sqlite3')
+        try:
+            assert pragma(wrapper, 'journal_mode') == 'wal', (
+                'Проверьте, что SQLite переводится в режим WAL'
+            )
+            assert pragma(wrapper, 'synchronous') == 1
+            assert pragma(wrapper, 'busy_timeout') == (
+                wrapper.settings_dict['PRAGMAS']['busy_timeout']
+            )
+        finally:
+            wrapper.close()
+
+    @pytest.mark.usefixtures('file_db')
+    def test_04_concurrent_read_then_write(self, tmp_path):
+        path = tmp_path / 'concurrent.sqlite3'
+        setup = file_connection(path)
+        with setup.cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (value integer)')
+            cursor.execute('INSERT INTO counter VALUES (0)')
+        setup.close()
+        errors = []
+
+        def increment():
+            wrapper = file_connection(path)
+            try:
+                for _ in range(20):
+                    # Начало транзакции как в transaction.atomic().
+                    wrapper.set_autocommit(
+                        False,
+                        force_begin_transaction_with_broken_autocommit=True
+                    )
+                    with wrapper.cursor() as cursor:
+                        # Чтение, затем запись: с обычным BEGIN такая
+                        # транзакция получает database is locked.
+                        cursor.execute('SELECT value FROM counter')
+                        value = cursor.fetchone()[0]
+                        cursor.execute('UPDATE counter SET value = %s',
+                                       [value + 1])
+                    wrapper.commit()
+                    wrapper.set_autocommit(True)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                wrapper.close()
+
+        threads = [threading.Thread(target=increment) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, (
+            'Проверьте, что параллельные транзакции SQLite не падают '
+            f'с ошибкой блокировки: {errors[:1]}'
+        )
+        check = file_connection(path)
+        try:
+            with check.cursor() as cursor:
+                cursor.execute('SELECT value FROM counter')
+                assert cursor.fetchone()[0] == 80
+        finally:
+            check.close()
+
+    @pytest.mark.usefixtures('file_db')
+    @pytest.mark.parametrize('usable', (True, False))
+    def test_05_health_check(self, tmp_path, monkeypatch, usable):
+        wrapper = file_connection(tmp_path / 'health.sqlite3')
+        wrapper.ensure_connection()
+        monkeypatch.setattr(connections, 'all', lambda: [wrapper])
+        monkeypatch.setattr(wrapper, 'is_usable', lambda: usable)
+        try:
+            check_connections()
+            assert (wrapper.connection is not None) == usable, (
+                'Проверьте, что перед запросом закрываются только '
+                'оборванные постоянные подключения'
+            )
+        finally:
+            wrapper.close()
+
+    @pytest.mark.usefixtures('file_db')
+    def test_06_health_check_interval(self, tmp_path, monkeypatch):
+        wrapper = file_connection(tmp_path / 'interval.sqlite3')
+        wrapper.settings_dict['CONN_HEALTH_CHECK_INTERVAL'] = 60
+        wrapper.ensure_connection()
+        checks = []
+        monkeypatch.setattr(connections, 'all', lambda: [wrapper])
+        monkeypatch.setattr(wrapper, 'is_usable',
+                            lambda: checks.append(1) or True)
+        try:
+            for _ in range(3):
+                check_connections()
+            assert len(checks) == 1, (
+                'Проверьте, что подключение проверяется не на каждом '
+                'запросе, а раз в CONN_HEALTH_CHECK_INTERVAL секунд'
+            )
+        finally:
+            wrapper.close()
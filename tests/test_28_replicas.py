@@ -0,0 +1,140 @@
+import sqlite3
+from collections import Counter
+
+import pytest
+from django.db import connections
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from api_yamdb.database import replicas_from_env
+from api_yamdb.replicas import PIN_COOKIE, WeightedRoundRobin
+
+
+@pytest.fixture
+def replica(tmp_path):
+    """
+    Вторая база SQLite в файле - снимок основной на момент вызова
+    snapshot(): записи после снимка есть только в основной базе.
+    """
+    path = str(tmp_path / 'replica.sqlite3')
+    connections.databases['replica'] = dict(
+        connections['default'].settings_dict, NAME=path
+    )
+
+    def snapshot():
+        primary = connections['default']
+        primary.ensure_connection()
+        target = sqlite3.connect(path)
+        primary.connection.backup(target)
+        target.close()
+
+    with override_settings(DATABASE_REPLICAS={'replica': 1}):
+        yield snapshot
+    connections['replica'].close()
+    del connections.databases['replica']
+    if hasattr(connections._connections, 'replica'):
+        delattr(connections._connections, 'replica')
+
+
+def review_texts(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+    assert response.status_code == 200
+    return [review['text'] for review in response.json()['results']]
+
+
+class Test28Replicas:
+
+    def test_01_weighted_round_robin(self):
+        balancer = WeightedRoundRobin({'a': 3, 'b': 1})
+        picks = [balancer.next() for _ in range(8)]
+        assert picks[:4] == ['a', 'a', 'b', 'a'], (
+            'Проверьте, что реплики перебираются плавно по весам'
+        )
+        assert Counter(picks) == {'a': 6, 'b': 2}
+
+    def test_02_replicas_from_env(self):
+        assert replicas_from_env({'DB_REPLICAS': 'one:3, two'}) == {
+            'one': 3, 'two': 1
+        }
+        assert replicas_from_env({}) == {}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_reads_from_replica_and_pins_writer(self, replica, user,
+                                                   admin):
+        from rest_framework_simplejwt.tokens import AccessToken
+        from reviews.models import Category, Review, Title
+
+        category = Category.objects.create(name='Фильм', slug='movie')
+        title = Title.objects.create(name='Тайтл', year=2000,
+                                     category=category)
+        replica()
+        Review.objects.create(title=title, author=admin, score=5,
+                              text='Только в основной базе')
+
+        anonymous = APIClient()
+        assert review_texts(anonymous, title) == [], (
+            'Проверьте, что GET запросы читают с реплики'
+        )
+
+        writer = APIClient()
+        writer.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        response = writer.post(f'/api/v1/titles/{title.id}/reviews/',
+                               data={'text': 'Мой отзыв', 'score': 7})
+        assert response.status_code == 201
+        assert PIN_COOKIE in response.cookies, (
+            'Проверьте, что после записи клиент закрепляется '
+            'за основной базой'
+        )
+        assert sorted(review_texts(writer, title)) == [
+            'Мой отзыв', 'Только в основной базе'
+        ], 'Проверьте, что автор сразу видит свой отзыв'
+        assert review_texts(anonymous, title) == [], (
+            'Проверьте, что клиент без записи читает с реплики'
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_failed_write_does_not_pin(self, replica, user):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        replica()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        response = client.post('/api/v1/titles/100500/reviews/',
+                               data={'text': 'Нет тайтла', 'score': 7})
+        assert response.status_code == 404
+        assert PIN_COOKIE not in response.cookies
+
+    @pytest.mark.django_db(transaction=True)
+    @override_settings(API_CACHE_TIMEOUT=300)
+    def test_05_replica_reads_are_not_cached(self, replica):
+        from reviews.models import Category, Title
+
+        category = Category.objects.create(name='Фильм', slug='movie')
+        Title.objects.create(name='Старый', year=2000, category=category)
+        replica()
+        Title.objects.create(name='Новый', year=2001, category=category)
+
+        anonymous = APIClient()
+        response = anonymous.get('/api/v1/titles/')
+        assert response.json()['count'] == 1
+        assert 'ETag' not in response, (
+            'Проверьте, что ответ с реплики не получает ETag: '
+            'реплика может отставать от текущей версии'
+        )
+
+        pinned = APIClient()
+        pinned.cookies[PIN_COOKIE] = '1'
+        response = pinned.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что отставший ответ реплики не попадает в кэш'
+        )
+        assert 'ETag' in response
+
+        response = anonymous.get('/api/v1/titles/')
+        assert response.json()['count'] == 2, (
+            'Проверьте, что кэш заполняется чтением из основной базы'
+        )